@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Benchmark Table Transformer throughput on one PDF
+
+Three modes:
+- Batch sizes: load the models once, then extract the same pages at each
+  batch size and report pages per second and per-batch latency for the
+  detection and structure stages.
+- Backends (--backends): run each CPU inference backend (eager fp32,
+  int8, onnx) and report its speed next to its agreement with the fp32
+  baseline, so the fastest acceptable setting is a measured choice.
+- Detection dpi (--dpis): render pages for detection at each resolution
+  (tables are always re-rendered at the structure dpi) and report render
+  and detection cost per page next to agreement with detection at the
+  structure dpi.
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+from methods.deep_learning.table_transformer_extractor import TableTransformerExtractor
+from methods.page_index import resolve_pages
+
+# Detected tables on the same page with at least this IoU are the same table
+MATCH_IOU = 0.9
+
+
+def run_once(extractor: TableTransformerExtractor, pdf_path: str, pages: str,
+             num_pages: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Extract once and return (timing result, tables)"""
+    tables = extractor.extract_tables(pdf_path, pages=pages)
+    seconds = extractor.extraction_time
+
+    result = {
+        'batch_size': extractor.batch_size,
+        'pages': num_pages,
+        'tables': len(tables),
+        'seconds': seconds,
+        'pages_per_second': num_pages / seconds if seconds > 0 else 0,
+        'batches': extractor.batch_summary(),
+    }
+    return result, tables
+
+
+def benchmark_batch_sizes(extractor: TableTransformerExtractor, pdf_path: str,
+                          pages: str, batch_sizes: List[int]) -> List[Dict[str, Any]]:
+    """
+    Time extraction of the same pages at several batch sizes
+
+    Returns:
+        One result per batch size: tables, seconds, pages/second and the
+        extractor's per-stage batch summary
+    """
+    num_pages = len(resolve_pages(pdf_path, pages))
+    results = []
+
+    for batch_size in batch_sizes:
+        extractor.batch_size = batch_size
+        result, _ = run_once(extractor, pdf_path, pages, num_pages)
+        results.append(result)
+
+    return results
+
+
+def _iou(a: List[float], b: List[float]) -> float:
+    """Intersection over union of two (x0, top, x1, bottom) boxes"""
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def agreement(baseline: List[Dict[str, Any]], tables: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    How closely a backend's tables match the fp32 baseline
+
+    Returns:
+        detection: matched tables / max(baseline, backend tables)
+        structure: share of matched tables with the same rows x columns
+        cells: share of identical cell text within same-shape tables
+    """
+    matched = []
+    used = set()
+    for base in baseline:
+        for i, table in enumerate(tables):
+            if (i not in used and table['page'] == base['page'] and
+                    _iou(base['bbox'], table['bbox']) >= MATCH_IOU):
+                used.add(i)
+                matched.append((base, table))
+                break
+
+    same_shape = [(a, b) for a, b in matched
+                  if (a['num_rows'], a['num_cols']) == (b['num_rows'], b['num_cols'])]
+    cells = sum(a['num_rows'] * a['num_cols'] for a, _ in same_shape)
+    equal_cells = sum(ca == cb for a, b in same_shape
+                      for ra, rb in zip(a['data'], b['data']) for ca, cb in zip(ra, rb))
+
+    most = max(len(baseline), len(tables))
+    return {
+        'detection': len(matched) / most if most else 1.0,
+        'structure': len(same_shape) / len(matched) if matched else 1.0,
+        'cells': equal_cells / cells if cells else 1.0,
+    }
+
+
+def compare_backends(pdf_path: str, pages: str, backends: List[str], batch_size: int,
+                     device: str = None, intra_op_threads: int = None,
+                     inter_op_threads: int = None) -> List[Dict[str, Any]]:
+    """
+    Time each backend on the same pages and score it against eager fp32
+
+    The eager baseline always runs first. Each backend loads its own
+    models; the previous extractor is released before the next loads.
+    """
+    num_pages = len(resolve_pages(pdf_path, pages))
+    backends = ['eager'] + [b for b in backends if b != 'eager']
+    results = []
+    baseline = None
+
+    for backend in backends:
+        extractor = TableTransformerExtractor(
+            verbose=False, device=device if backend == 'eager' else 'cpu',
+            batch_size=batch_size, backend=backend,
+            intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads
+        )
+        result, tables = run_once(extractor, pdf_path, pages, num_pages)
+        del extractor
+
+        if baseline is None:
+            baseline = tables
+        result['backend'] = backend
+        result['agreement'] = agreement(baseline, tables)
+        results.append(result)
+
+    return results
+
+
+def sweep_dpi(pdf_path: str, pages: str, dpis: List[int], batch_size: int,
+              structure_dpi: int = 200, device: str = None) -> List[Dict[str, Any]]:
+    """
+    Time detection at each page resolution and score it against the baseline
+
+    The baseline renders pages at structure_dpi, the cost of one fixed
+    resolution for both stages, and always runs first. The models are
+    loaded once.
+    """
+    num_pages = len(resolve_pages(pdf_path, pages))
+    dpis = [structure_dpi] + [d for d in dpis if d != structure_dpi]
+    extractor = TableTransformerExtractor(verbose=False, device=device, batch_size=batch_size,
+                                          structure_dpi=structure_dpi)
+    results = []
+    baseline = None
+
+    for dpi in dpis:
+        extractor.detection_dpi = dpi
+        result, tables = run_once(extractor, pdf_path, pages, num_pages)
+
+        if baseline is None:
+            baseline = tables
+        detection = result['batches'].get('detection', {})
+        result['detection_dpi'] = dpi
+        result['render_per_page'] = extractor.render_time / num_pages if num_pages else 0
+        # Detection batches include the processor's resize and normalization
+        result['detection_per_page'] = (detection.get('mean_latency', 0) * detection.get('batches', 0)
+                                        / num_pages if num_pages else 0)
+        result['region_render'] = extractor.region_render_time
+        result['agreement'] = agreement(baseline, tables)
+        results.append(result)
+
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]):
+    """Print one line per batch size and stage"""
+    print(f"\n{'batch':>5} {'pages/s':>8} {'stage':<10} {'batches':>7} "
+          f"{'mean s/batch':>12} {'max s/batch':>11}")
+    for result in results:
+        for stage, stats in result['batches'].items():
+            print(f"{result['batch_size']:>5} {result['pages_per_second']:>8.2f} {stage:<10} "
+                  f"{stats['batches']:>7} {stats['mean_latency']:>12.3f} {stats['max_latency']:>11.3f}")
+
+
+def print_backend_results(results: List[Dict[str, Any]]):
+    """Print one line per backend: speed, then agreement with fp32"""
+    print(f"\n{'backend':<8} {'pages/s':>8} {'det s/batch':>11} {'str s/batch':>11} "
+          f"{'det agree':>9} {'str agree':>9} {'cell agree':>10}")
+    for result in results:
+        batches = result['batches']
+        det = batches.get('detection', {}).get('mean_latency', 0)
+        struct = batches.get('structure', {}).get('mean_latency', 0)
+        agree = result['agreement']
+        print(f"{result['backend']:<8} {result['pages_per_second']:>8.2f} {det:>11.3f} "
+              f"{struct:>11.3f} {agree['detection']:>9.1%} {agree['structure']:>9.1%} "
+              f"{agree['cells']:>10.1%}")
+
+
+def print_dpi_results(results: List[Dict[str, Any]]):
+    """Print one line per detection dpi: cost per page, then agreement"""
+    print(f"\n{'dpi':>4} {'pages/s':>8} {'render s/pg':>11} {'detect s/pg':>11} "
+          f"{'tables s':>8} {'det agree':>9} {'str agree':>9} {'cell agree':>10}")
+    for result in results:
+        agree = result['agreement']
+        print(f"{result['detection_dpi']:>4} {result['pages_per_second']:>8.2f} "
+              f"{result['render_per_page']:>11.3f} {result['detection_per_page']:>11.3f} "
+              f"{result['region_render']:>8.2f} {agree['detection']:>9.1%} "
+              f"{agree['structure']:>9.1%} {agree['cells']:>10.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Table Transformer throughput")
+    parser.add_argument('pdf', help='PDF file to extract')
+    parser.add_argument('--pages', default='all', help="Pages to process ('all' or '1-10')")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Batch sizes to compare (default: 1 2 4 8; '
+                             'the first is used with --backends and --dpis)')
+    parser.add_argument('--backends', nargs='+', default=None,
+                        choices=['eager', 'int8', 'onnx'],
+                        help='Compare CPU backends against eager fp32 instead of batch sizes')
+    parser.add_argument('--dpis', type=int, nargs='+', default=None,
+                        help='Compare detection resolutions (e.g. 72 100 150) instead of batch sizes')
+    parser.add_argument('--structure-dpi', type=int, default=200,
+                        help='Resolution tables are re-rendered at (default: 200)')
+    parser.add_argument('--intra-op-threads', type=int, default=None,
+                        help='Threads per operator (default: library default)')
+    parser.add_argument('--inter-op-threads', type=int, default=None,
+                        help='Operators run in parallel (default: library default)')
+    parser.add_argument('--device', default=None, help="'cpu' or 'cuda' (default: auto)")
+    parser.add_argument('--output', default=None, help='Save results to this JSON file')
+
+    args = parser.parse_args()
+
+    if args.backends:
+        results = compare_backends(args.pdf, args.pages, args.backends, args.batch_sizes[0],
+                                   device=args.device, intra_op_threads=args.intra_op_threads,
+                                   inter_op_threads=args.inter_op_threads)
+        print_backend_results(results)
+    elif args.dpis:
+        results = sweep_dpi(args.pdf, args.pages, args.dpis, args.batch_sizes[0],
+                            structure_dpi=args.structure_dpi, device=args.device)
+        print_dpi_results(results)
+    else:
+        extractor = TableTransformerExtractor(verbose=False, device=args.device,
+                                              intra_op_threads=args.intra_op_threads,
+                                              inter_op_threads=args.inter_op_threads)
+        results = benchmark_batch_sizes(extractor, args.pdf, args.pages, args.batch_sizes)
+        print_results(results)
+
+    if args.output:
+        output_file = Path(args.output)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, 'w') as f:
+            json.dump({'pdf': args.pdf, 'results': results}, f, indent=2)
+        print(f"\nSaved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -51,6 +51,9 @@ try:
 except ImportError:
     GEMINI_AVAILABLE = False
 
+from methods.page_index import detect_table_pages, format_pages
+from methods.pdf_source import PdfInput, PdfSource, pdf_name
+
 # Hybrid methods
 try:
     from methods.hybrid.layout_gpt4_extractor import LayoutGPT4Extractor
@@ -58,14 +61,23 @@ try:
 except ImportError:
     HYBRID_AVAILABLE = False
 
-def run_method(name: str, extractor, pdf_path: str, verbose: bool = False) -> Dict:
-    """Run a single extraction method"""
+# Methods billed per page
+PAID_METHODS = ['gpt4_vision', 'claude_vision', 'gemini_vision', 'hybrid_layout_gpt4']
+# Methods that read rendered page images, so they also work on scans
+IMAGE_METHODS = ['table_transformer'] + PAID_METHODS
+
+def run_method(name: str, extractor, pdf_path: PdfInput, verbose: bool = False,
+               pages: str = None) -> Dict:
+    """Run a single extraction method (pages=None uses the extractor's default)"""
     print(f"\n{'='*70}")
     print(f"Method: {name}")
     print(f"{'='*70}")
     
     try:
-        tables = extractor.extract_tables(pdf_path)
+        if pages is None:
+            tables = extractor.extract_tables(pdf_path)
+        else:
+            tables = extractor.extract_tables(pdf_path, pages=pages)
         return {
             'tables': tables,
             'count': len(tables),
@@ -80,13 +92,19 @@ def run_method(name: str, extractor, pdf_path: str, verbose: bool = False) -> Di
             traceback.print_exc()
         return {'success': False, 'error': str(e)}
 
-def compare_all_methods(pdf_path: str, methods: List[str] = None):
-    """Compare all available extraction methods"""
-    
-    print("="*70)
-    print("PDF Table Extraction - COMPLETE COMPARISON")
-    print("="*70)
-    print(f"\nFile: {pdf_path}\n")
+def _run_methods(source: PdfSource, methods: List[str], pages: str) -> Dict[str, Dict]:
+    """Run each selected method on one shared source; see compare_all_methods"""
+    method_pages = {}
+    if pages is None:
+        pages = format_pages(detect_table_pages(source))
+        print(f"Table pages detected: {pages or 'none'}\n")
+        if not pages:
+            # Nothing in the text layer (e.g. a scan): only image-based
+            # methods can find tables, so they are not limited to the index
+            print("No text-layer tables: image-based methods run on all pages "
+                  "(paid methods on their default page)\n")
+            method_pages = {name: 'all' for name in IMAGE_METHODS}
+            method_pages.update({name: None for name in PAID_METHODS})
     
     results = {}
     
@@ -113,7 +131,7 @@ def compare_all_methods(pdf_path: str, methods: List[str] = None):
             print(f"\n{'='*70}")
             print(f"Method: {method_name}")
             print(f"{'='*70}")
-            if method_name in ['gpt4_vision', 'claude_vision', 'gemini_vision', 'hybrid_layout_gpt4']:
+            if method_name in PAID_METHODS:
                 print("⚠ Skipped - API key not configured")
                 print(f"  Set {method_name.upper()}_API_KEY in .env file")
             else:
@@ -123,7 +141,8 @@ def compare_all_methods(pdf_path: str, methods: List[str] = None):
         
         try:
             extractor = extractor_fn()
-            results[method_name] = run_method(method_name, extractor, pdf_path)
+            results[method_name] = run_method(method_name, extractor, source,
+                                             pages=method_pages.get(method_name, pages))
         except Exception as e:
             print(f"\n{'='*70}")
             print(f"Method: {method_name}")
@@ -131,6 +150,34 @@ def compare_all_methods(pdf_path: str, methods: List[str] = None):
             print(f"✗ Error initializing: {e}")
             results[method_name] = {'success': False, 'error': str(e)}
     
+    return results
+
+def compare_all_methods(pdf_path: PdfInput, methods: List[str] = None, pages: str = None):
+    """
+    Compare all available extraction methods
+    
+    Args:
+        pdf_path: PDF to compare on (path, bytes, mmap or file object);
+                  in-memory input is written to at most one temp file,
+                  shared by every method that needs a path
+        methods: Method names to run (default: all available)
+        pages: Pages to process; None detects table pages once from the
+               text layer and shares them across all methods. When none
+               are found (e.g. a scan), image-based methods still run on
+               all pages, or on their default page for the paid ones.
+    """
+    
+    print("="*70)
+    print("PDF Table Extraction - COMPLETE COMPARISON")
+    print("="*70)
+    print(f"\nFile: {pdf_name(pdf_path)}\n")
+    
+    source = PdfSource(pdf_path)
+    try:
+        results = _run_methods(source, methods, pages)
+    finally:
+        source.close()
+    
     # Summary
     print("\n" + "="*70)
     print("COMPARISON SUMMARY")
@@ -161,7 +208,7 @@ def compare_all_methods(pdf_path: str, methods: List[str] = None):
         print(f"{'='*70}")
     
     # Save results
-    output_file = Path(pdf_path).stem + "_all_methods_comparison.json"
+    output_file = Path(pdf_name(pdf_path)).stem + "_all_methods_comparison.json"
     with open(output_file, 'w') as f:
         json.dump(results, f, indent=2, default=str)
     
@@ -206,7 +253,7 @@ def compare_all_methods(pdf_path: str, methods: List[str] = None):
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python compare_all_methods.py <pdf_file> [methods...]")
+        print("Usage: python compare_all_methods.py <pdf_file> [methods...] [--pages SPEC]")
         print("\nAvailable methods:")
         print("  Traditional: pdfplumber, camelot, tabula")
         print("  Deep Learning: table_transformer, docling")
@@ -215,6 +262,8 @@ def main():
         print("\nExamples:")
         print("  python compare_all_methods.py file.pdf")
         print("  python compare_all_methods.py file.pdf pdfplumber gpt4_vision")
+        print("  python compare_all_methods.py file.pdf --pages all")
+        print("\nWithout --pages, table pages are detected from the text layer")
         print("\nNote: LLM methods require API keys in .env file")
         sys.exit(1)
     
@@ -224,10 +273,19 @@ def main():
         print(f"Error: File not found: {pdf_path}")
         sys.exit(1)
     
+    args = sys.argv[2:]
+    
+    # Optional explicit page spec
+    pages = None
+    if '--pages' in args:
+        i = args.index('--pages')
+        pages = args[i + 1]
+        args = args[:i] + args[i + 2:]
+    
     # Get specific methods if provided
-    methods = sys.argv[2:] if len(sys.argv) > 2 else None
+    methods = args if args else None
     
-    compare_all_methods(pdf_path, methods)
+    compare_all_methods(pdf_path, methods, pages=pages)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Column-projected, lazily decoded access to the FinTabNet.c dataset
+"""
+import dataclasses
+import io
+from typing import List, Any, Optional, Tuple
+
+# Columns the benchmark runner actually reads from a sample
+DEFAULT_COLUMNS = [
+    '__key__',
+    '__url__',
+    'pdf',
+    'pdf_path',
+    'json',
+    'tables',
+    'ground_truth',
+]
+
+
+def project_columns(data, columns: Optional[List[str]] = None,
+                    decode: bool = False):
+    """
+    Restrict a dataset to the columns the caller needs
+
+    Works for both ``Dataset`` (load_from_disk / load_dataset) and
+    ``IterableDataset`` (streaming=True). Columns that are not selected
+    are never read from the Arrow files. Heavy columns that support
+    decoding (images, PDFs, audio) are kept as undecoded
+    {'bytes', 'path'} dicts unless ``decode`` is True; sample_pdf and
+    decode_image read them on demand.
+
+    Args:
+        data: Dataset or IterableDataset
+        columns: Columns to keep (default: DEFAULT_COLUMNS). Names that
+                 are not in the dataset are ignored.
+        decode: Decode heavy columns eagerly (the library default)
+
+    Returns:
+        Projected dataset
+    """
+    columns = DEFAULT_COLUMNS if columns is None else columns
+    available = list(data.features.keys()) if data.features else None
+
+    if available is not None:
+        keep = [c for c in columns if c in available]
+        if keep and len(keep) < len(available):
+            data = data.select_columns(keep)
+
+    if not decode and data.features:
+        for name, feature in data.features.items():
+            if getattr(feature, 'decode', False):
+                # Keep the feature's other settings (e.g. an image mode)
+                data = data.cast_column(name, dataclasses.replace(feature, decode=False))
+
+    return data
+
+
+def sample_pdf(sample: dict) -> Tuple[Any, Optional[str]]:
+    """
+    A sample's PDF as extractor input, and the document name it is indexed by
+
+    Undecoded PDF columns hold {'bytes', 'path'}: the bytes go to the
+    extractor as they are (no temp file unless a backend needs a path)
+    and the path names the document. Plain string columns are both.
+
+    Returns:
+        (PdfInput or None, document name or None)
+    """
+    value = sample.get('pdf_path') or sample.get('pdf')
+    if isinstance(value, dict):
+        name = value.get('path')
+        data = value.get('bytes')
+        return (data if data is not None else name), name
+    return value, (value if isinstance(value, str) else None)
+
+
+def decode_image(value: Any, mode: Optional[str] = None):
+    """
+    Decode an image column value that was loaded with decode=False
+
+    Args:
+        value: {'bytes', 'path'} dict, raw bytes, path, or an already
+               decoded PIL image
+        mode: PIL mode to convert to (e.g. the Image feature's mode)
+
+    Returns:
+        PIL Image
+    """
+    from PIL import Image
+
+    if isinstance(value, dict):
+        value = value['bytes'] if value.get('bytes') is not None else value.get('path')
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = io.BytesIO(value)
+    image = value if isinstance(value, Image.Image) else Image.open(value)
+    image.load()
+    if mode and image.mode != mode:
+        image = image.convert(mode)
+    return image
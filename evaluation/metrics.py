@@ -3,7 +3,8 @@
 Evaluation metrics for table extraction
 """
 import json
-from typing import List, Dict, Any, Tuple
+from itertools import zip_longest
+from typing import List, Dict, Any, Iterable, Tuple
 import time
 
 def normalize_table(table: List[List[Any]]) -> List[List[str]]:
@@ -75,15 +76,18 @@ def calculate_structure_accuracy(predicted: List[List[str]],
         'structure_match': row_match and col_match
     }
 
-def evaluate_extraction(predicted_tables: List[List[List[str]]], 
-                       ground_truth_tables: List[List[List[str]]],
+def evaluate_extraction(predicted_tables: Iterable[List[List[str]]], 
+                       ground_truth_tables: Iterable[List[List[str]]],
                        method_name: str = "Unknown") -> Dict[str, Any]:
     """
     Evaluate table extraction results
     
+    Both inputs may be lists or iterators (e.g. the 'data' of tables from
+    an extractor's iter_tables); tables are consumed one at a time.
+    
     Args:
-        predicted_tables: List of predicted tables
-        ground_truth_tables: List of ground truth tables
+        predicted_tables: Predicted tables
+        ground_truth_tables: Ground truth tables
         method_name: Name of extraction method
         
     Returns:
@@ -91,23 +95,27 @@ def evaluate_extraction(predicted_tables: List[List[List[str]]],
     """
     start_time = time.time()
     
-    # Basic stats
-    num_predicted = len(predicted_tables)
-    num_ground_truth = len(ground_truth_tables)
-    
     results = {
         'method': method_name,
-        'num_predicted_tables': num_predicted,
-        'num_ground_truth_tables': num_ground_truth,
-        'table_detection_recall': (num_predicted / num_ground_truth * 100) if num_ground_truth > 0 else 0,
         'per_table_metrics': []
     }
     
     # Evaluate each table
     total_cell_accuracy = 0
     total_structure_matches = 0
-    
-    for i, (pred, gt) in enumerate(zip(predicted_tables, ground_truth_tables)):
+    num_predicted = 0
+    num_ground_truth = 0
+    
+    missing = object()
+    for pred, gt in zip_longest(predicted_tables, ground_truth_tables, fillvalue=missing):
+        if pred is not missing:
+            num_predicted += 1
+        if gt is not missing:
+            num_ground_truth += 1
+        if pred is missing or gt is missing:
+            continue
+        i = len(results['per_table_metrics'])
+        
         # Normalize
         pred_norm = normalize_table(pred)
         gt_norm = normalize_table(gt)
@@ -128,6 +136,11 @@ def evaluate_extraction(predicted_tables: List[List[List[str]]],
         if struct_acc['structure_match']:
             total_structure_matches += 1
     
+    # Basic stats
+    results['num_predicted_tables'] = num_predicted
+    results['num_ground_truth_tables'] = num_ground_truth
+    results['table_detection_recall'] = (num_predicted / num_ground_truth * 100) if num_ground_truth > 0 else 0
+    
     # Aggregate metrics
     num_compared = min(num_predicted, num_ground_truth)
     if num_compared > 0:
@@ -5,11 +5,14 @@ Inspect FinTabNet.c dataset structure to understand format
 from datasets import load_dataset
 import json
 
+from evaluation.dataset import project_columns
+
 print("Inspecting FinTabNet.c dataset structure...")
 print("=" * 60)
 
 # Load streaming dataset
 dataset = load_dataset("bsmock/FinTabNet.c", split="train", streaming=True)
+dataset = project_columns(dataset, ['__key__', '__url__', 'json'])
 
 # Get first 3 samples
 print("\nFetching first 3 samples...\n")
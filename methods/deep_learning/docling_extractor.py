@@ -2,99 +2,304 @@
 """
 PDF Table Extraction using Docling (IBM Research)
 """
+import io
+import itertools
 import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Iterable
 import time
 
+from methods.json_writer import write_tables_json
+from methods.page_index import parse_pages, resolve_pages, page_runs
+from methods.pdf_source import PdfInput, PdfSource, pdf_source, pdf_name
+
 try:
-    from docling.document_converter import DocumentConverter
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
+    from docling.document_converter import DocumentConverter, PdfFormatOption
     DOCLING_AVAILABLE = True
 except ImportError:
     DOCLING_AVAILABLE = False
 
+# 'default' is Docling's stock converter; 'tables' keeps only the stages
+# that feed document.tables (parsing, layout, table structure)
+PIPELINES = ('default', 'tables')
+TABLE_MODES = ('accurate', 'fast')
+
+# Stages the tables pipeline turns off. Options the installed Docling
+# does not have are skipped.
+TABLE_ONLY_OPTIONS = {
+    'do_picture_classification': False,
+    'do_picture_description': False,
+    'do_code_enrichment': False,
+    'do_formula_enrichment': False,
+    'generate_page_images': False,
+    'generate_picture_images': False,
+    'generate_table_images': False,
+}
+
+
+def table_pipeline_options(ocr: bool = False, table_mode: str = 'accurate'):
+    """
+    PDF pipeline options for table extraction only
+    
+    Args:
+        ocr: OCR page images; only needed for scans, the text layer of
+             born-digital PDFs is read directly
+        table_mode: TableFormer model, 'accurate' or 'fast'
+    """
+    options = PdfPipelineOptions()
+    for name, value in TABLE_ONLY_OPTIONS.items():
+        if hasattr(options, name):
+            setattr(options, name, value)
+    
+    options.do_ocr = ocr
+    options.do_table_structure = True
+    options.table_structure_options.mode = (TableFormerMode.ACCURATE if table_mode == 'accurate'
+                                            else TableFormerMode.FAST)
+    # Cell text from the PDF text layer rather than the model's predictions
+    options.table_structure_options.do_cell_matching = True
+    return options
+
+
+# Converters built in this process, one per configuration; building one
+# loads its layout and table models
+_converters = {}
+
+
+def shared_converter(pipeline: str = 'tables', ocr: bool = False,
+                     table_mode: str = 'accurate', document_timeout: float = None):
+    """Return this process's converter for a configuration, building it once"""
+    key = (pipeline, ocr, table_mode, document_timeout)
+    if key not in _converters:
+        if pipeline == 'default' and document_timeout is None:
+            converter = DocumentConverter()
+        else:
+            if pipeline == 'default':
+                options = PdfPipelineOptions()
+            else:
+                options = table_pipeline_options(ocr=ocr, table_mode=table_mode)
+            # Docling stops converting a document's remaining pages after
+            # this many seconds and returns it as a partial success
+            options.document_timeout = document_timeout
+            converter = DocumentConverter(
+                format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=options)}
+            )
+        # Load the models now instead of inside the first conversion
+        converter.initialize_pipeline(InputFormat.PDF)
+        _converters[key] = converter
+    return _converters[key]
+
+
 class DoclingExtractor:
     """Extract tables from PDF using Docling"""
     
-    def __init__(self, verbose: bool = True):
+    def __init__(self, verbose: bool = True, pipeline: str = 'tables', ocr: bool = False,
+                 table_mode: str = 'accurate'):
+        """
+        Args:
+            verbose: Print progress
+            pipeline: 'tables' (layout and table structure only) or
+                      'default' (Docling's full conversion)
+            ocr: OCR pages in the tables pipeline (for scanned PDFs)
+            table_mode: TableFormer model, 'accurate' or 'fast'
+        """
+        if pipeline not in PIPELINES:
+            raise ValueError(f"Unknown pipeline: {pipeline} (expected one of {PIPELINES})")
+        if table_mode not in TABLE_MODES:
+            raise ValueError(f"Unknown table mode: {table_mode} (expected one of {TABLE_MODES})")
         self.verbose = verbose
         self.extraction_time = 0
+        self.pipeline = pipeline
+        self.ocr = ocr
+        self.table_mode = table_mode
         
         if not DOCLING_AVAILABLE:
             raise ImportError("Docling not installed. Run: uv pip install docling")
         
         if self.verbose:
-            print("Initializing Docling converter...")
+            print(f"Initializing Docling converter (pipeline: {pipeline})...")
         
-        # Initialize converter
-        self.converter = DocumentConverter()
+        # Shared by every extractor with the same configuration and reused
+        # for every document
+        self.converter = shared_converter(pipeline, ocr, table_mode)
         
         if self.verbose:
             print("Docling ready!")
     
-    def extract_tables(self, pdf_path: str, pages: str = 'all') -> List[Dict[str, Any]]:
+    @staticmethod
+    def _input_name(name: str, index: int = None) -> str:
+        """File name Docling sees for an in-memory document named name"""
+        name = Path(name).name
+        if not name.lower().endswith('.pdf'):
+            name = 'document.pdf' if index is None else f"document-{index}.pdf"
+        return name
+    
+    @classmethod
+    def _convert_input(cls, source: PdfSource, index: int = None):
+        """
+        Converter input for a PdfSource
+        
+        Docling reads in-memory documents from a DocumentStream, so no
+        temp file is written for them. Unnamed streams are called
+        document.pdf, or document-<index>.pdf when an input index is given
+        so that the documents of a batch stay distinguishable.
+        """
+        if source.is_path:
+            return source.path
+        
+        from docling.datamodel.base_models import DocumentStream
+        return DocumentStream(name=cls._input_name(source.name, index),
+                              stream=io.BytesIO(source.getvalue()))
+    
+    @staticmethod
+    def _table_page(table) -> int:
+        """1-based page number of a Docling table (-1 if unknown)"""
+        prov = getattr(table, 'prov', None)
+        if prov:
+            return getattr(prov[0], 'page_no', -1)
+        return getattr(table, 'page_no', -1)
+    
+    def _table_info(self, table, table_idx: int, page_num: int,
+                    log: bool = True) -> Dict[str, Any]:
+        """Convert a Docling table to our table dict (None if it has no cells)"""
+        # Convert table to 2D array
+        table_data = []
+        
+        # Get table dimensions
+        if hasattr(table, 'data') and table.data:
+            # Table has structured data
+            for row in table.data:
+                row_data = [str(cell) for cell in row]
+                table_data.append(row_data)
+        else:
+            # Try to extract from text representation
+            if hasattr(table, 'text'):
+                # Parse text representation (simplified)
+                lines = table.text.strip().split('\n')
+                for line in lines:
+                    cells = [cell.strip() for cell in line.split('|') if cell.strip()]
+                    if cells:
+                        table_data.append(cells)
+        
+        if not table_data:
+            return None
+        
+        table_info = {
+            'page': page_num,
+            'table_index': table_idx,
+            'data': table_data,
+            'num_rows': len(table_data),
+            'num_cols': len(table_data[0]) if table_data else 0
+        }
+        
+        if self.verbose and log:
+            print(f"  Table {table_idx}: {table_info['num_rows']}x{table_info['num_cols']}")
+        
+        return table_info
+    
+    def _result_tables(self, results: Iterable, page_nums: List[int] = None,
+                       log: bool = True) -> List[Dict[str, Any]]:
+        """Tables of one document's conversion results, keeping only page_nums (None = all)"""
+        tables = []
+        table_idx = 0
+        for result in results:
+            for table in result.document.tables:
+                page_num = self._table_page(table)
+                if page_nums is not None and page_num not in page_nums:
+                    continue
+                
+                table_info = self._table_info(table, table_idx, page_num, log=log)
+                if table_info:
+                    tables.append(table_info)
+                table_idx += 1
+        return tables
+    
+    def iter_tables(self, pdf_path: PdfInput, pages: str = 'all') -> Iterator[Dict[str, Any]]:
+        """
+        Yield tables as each run of consecutive pages is converted
+        
+        Each run is one conversion (page_range=run), as in extract_tables,
+        so the document is loaded and parsed once per run rather than once
+        per page; tables of earlier runs are available before later runs
+        are processed. Errors propagate to the caller; use extract_tables
+        for the error-handling wrapper.
+        
+        Args:
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object
+            pages: Pages to process ('all' or page numbers)
+            
+        Yields:
+            Table dictionaries, in page order
+        """
+        start_time = time.time()
+        table_idx = 0
+        
+        with pdf_source(pdf_path) as source:
+            if self.verbose:
+                print(f"Processing {Path(source.name).name} with Docling (streaming)")
+            
+            for run in page_runs(resolve_pages(source, pages)):
+                result = self.converter.convert(self._convert_input(source), page_range=run)
+                
+                for table in result.document.tables:
+                    table_info = self._table_info(table, table_idx, self._table_page(table))
+                    if table_info:
+                        yield table_info
+                    table_idx += 1
+        
+        self.extraction_time = time.time() - start_time
+    
+    def extract_tables(self, pdf_path: PdfInput, pages: str = 'all') -> List[Dict[str, Any]]:
         """
         Extract tables from PDF using Docling
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object
             pages: Pages to process ('all' or page numbers)
             
         Returns:
             List of extracted tables with metadata
         """
         start_time = time.time()
-        tables = []
         
         if self.verbose:
-            print(f"Processing {Path(pdf_path).name} with Docling")
+            print(f"Processing {Path(pdf_name(pdf_path)).name} with Docling")
         
         try:
             # Convert document
             if self.verbose:
                 print(f"  Converting document...")
             
-            result = self.converter.convert(pdf_path)
+            page_nums = parse_pages(pages)
+            if page_nums is not None and not page_nums:
+                # Page index says this document has no tables
+                self.extraction_time = 0
+                return []
+            
+            with pdf_source(pdf_path) as source:
+                if page_nums is None:
+                    results = [self.converter.convert(self._convert_input(source))]
+                else:
+                    # One conversion per run of consecutive pages, so pages
+                    # between the requested ones are never processed
+                    results = [self.converter.convert(self._convert_input(source),
+                                                      page_range=run)
+                               for run in page_runs(page_nums)]
             
             # Extract tables from document
             if self.verbose:
                 print(f"  Extracting tables...")
             
-            for table_idx, table in enumerate(result.document.tables):
-                # Convert table to 2D array
-                table_data = []
-                
-                # Get table dimensions
-                if hasattr(table, 'data') and table.data:
-                    # Table has structured data
-                    for row in table.data:
-                        row_data = [str(cell) for cell in row]
-                        table_data.append(row_data)
-                else:
-                    # Try to extract from text representation
-                    if hasattr(table, 'text'):
-                        # Parse text representation (simplified)
-                        lines = table.text.strip().split('\n')
-                        for line in lines:
-                            cells = [cell.strip() for cell in line.split('|') if cell.strip()]
-                            if cells:
-                                table_data.append(cells)
-                
-                if table_data:
-                    table_info = {
-                        'page': getattr(table, 'page_no', -1),
-                        'table_index': table_idx,
-                        'data': table_data,
-                        'num_rows': len(table_data),
-                        'num_cols': len(table_data[0]) if table_data else 0
-                    }
-                    tables.append(table_info)
-                    
-                    if self.verbose:
-                        print(f"  Table {table_idx}: {table_info['num_rows']}x{table_info['num_cols']}")
+            tables = self._result_tables(results, page_nums)
         
         except Exception as e:
-            print(f"Error processing {pdf_path}: {e}")
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
             if self.verbose:
                 import traceback
                 traceback.print_exc()
@@ -107,14 +312,127 @@ class DoclingExtractor:
         
         return tables
     
+    def extract_batch(self, pdf_paths: Iterable[PdfInput], pages: str = 'all',
+                      max_concurrent: int = 4, document_timeout: float = None,
+                      batch_size: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Convert many PDFs concurrently, yielding per-file results
+        
+        Up to max_concurrent documents are converted at once on worker
+        threads sharing one converter, so that one document's parsing
+        overlaps another's layout and table inference. Concurrency is set
+        here rather than through Docling's process-wide batch settings,
+        which are left untouched. Each result is yielded, in input order,
+        as soon as its file (and every file before it) is done; a failed or
+        timed-out file is reported, not raised.
+        
+        Args:
+            pdf_paths: PDF file paths, or PDF bytes, memoryview, mmap or
+                       binary file objects
+            pages: Pages to process in every file ('all' or page numbers);
+                   Docling takes one page range per conversion, so the
+                   range from the first to the last page is converted and
+                   tables on other pages are dropped. An empty page list
+                   converts nothing and yields every file with no tables.
+            max_concurrent: Documents converted at the same time
+            document_timeout: Seconds after which Docling stops converting
+                              a document (its tables so far are kept and
+                              its status is partial_success)
+            batch_size: Documents submitted ahead of the next result
+                        (default and minimum: max_concurrent); bounds how
+                        many finished results wait behind a slow file
+            
+        Yields:
+            Per-file dicts: 'index' (position in pdf_paths), 'pdf_path',
+            'tables', 'num_tables', 'status' (Docling's conversion status)
+            and 'error' (None on success)
+        """
+        max_concurrent = max(1, max_concurrent)
+        batch_size = max(batch_size or max_concurrent, max_concurrent)
+        page_nums = parse_pages(pages)
+        
+        converter = (self.converter if document_timeout is None else
+                     shared_converter(self.pipeline, self.ocr, self.table_mode, document_timeout))
+        
+        start_time = time.time()
+        count = 0
+        with ThreadPoolExecutor(max_workers=max_concurrent) as pool:
+            pending = deque()
+            inputs = enumerate(pdf_paths)
+            while True:
+                # Keep batch_size documents submitted ahead of the next result
+                for index, pdf_path in itertools.islice(inputs, batch_size - len(pending)):
+                    pending.append(pool.submit(self._convert_one, converter, index,
+                                               pdf_path, page_nums))
+                if not pending:
+                    break
+                
+                output = pending.popleft().result()
+                count += 1
+                if self.verbose:
+                    status = (f"{output['num_tables']} tables" if output['error'] is None
+                              else f"error: {output['error']}")
+                    print(f"  [{count}] {Path(output['pdf_path']).name}: {status} "
+                          f"({output['status']}, {time.time() - start_time:.2f}s elapsed)")
+                yield output
+        
+        self.extraction_time = time.time() - start_time
+        
+        if self.verbose:
+            print(f"Processed {count} files in {self.extraction_time:.2f}s\n")
+    
+    def _convert_one(self, converter, index: int, pdf_path: PdfInput,
+                     page_nums: List[int]) -> Dict[str, Any]:
+        """Convert one file of a batch (on a worker thread) into its result dict"""
+        name = (pdf_name(pdf_path) if isinstance(pdf_path, (str, os.PathLike))
+                else self._input_name(pdf_name(pdf_path), index))
+        output = {
+            'index': index,
+            'pdf_path': name,
+            'tables': [],
+            'num_tables': 0,
+            'status': 'skipped',
+            'error': None
+        }
+        if page_nums is not None and not page_nums:
+            # Page index says this document has no tables
+            return output
+        
+        kwargs = {'page_range': (page_nums[0], page_nums[-1])} if page_nums else {}
+        try:
+            with pdf_source(pdf_path) as source:
+                result = converter.convert(self._convert_input(source, index),
+                                           raises_on_error=False, **kwargs)
+        except Exception as e:
+            output.update(status='failure', error=str(e))
+            return output
+        
+        output['status'] = getattr(result.status, 'value', str(result.status))
+        errors = [getattr(e, 'error_message', str(e)) for e in (result.errors or [])]
+        try:
+            output['tables'] = self._result_tables([result], page_nums, log=False)
+        except Exception as e:
+            errors.append(str(e))
+        
+        output['num_tables'] = len(output['tables'])
+        output['error'] = '; '.join(errors) or None
+        return output
+    
+    def _json_metadata(self) -> Dict[str, Any]:
+        """Run metadata written alongside the tables (tables_to_json, extract_to_file)"""
+        return {
+            'extraction_time': self.extraction_time,
+            'method': 'docling',
+            'pipeline': self.pipeline
+        }
+    
     def tables_to_json(self, tables: List[Dict[str, Any]], 
                        include_metadata: bool = True) -> str:
         """Convert extracted tables to JSON format"""
         if include_metadata:
             output = {
                 'num_tables': len(tables),
-                'extraction_time': self.extraction_time,
-                'method': 'docling',
+                **self._json_metadata(),
                 'tables': tables
             }
         else:
@@ -122,19 +440,19 @@ class DoclingExtractor:
         
         return json.dumps(output, indent=2)
     
-    def extract_to_file(self, pdf_path: str, output_path: str):
+    def extract_to_file(self, pdf_path: PdfInput, output_path: str, pages: str = 'all'):
         """Extract tables and save to JSON file"""
-        tables = self.extract_tables(pdf_path)
-        json_output = self.tables_to_json(tables)
-        
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w') as f:
-            f.write(json_output)
+        # Each table is written as soon as its page is done, the metadata
+        # once the iterator finishes
+        tables = self.iter_tables(pdf_path, pages=pages)
+        try:
+            num_tables = write_tables_json(output_path, tables, final_metadata=self._json_metadata)
+        except Exception as e:
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
+            return
         
         if self.verbose:
-            print(f"Saved to {output_file}")
+            print(f"Saved {num_tables} tables to {output_path}")
 
 def main():
     """Example usage"""
@@ -142,9 +460,25 @@ def main():
     
     if len(sys.argv) < 2:
         print("Usage: python docling_extractor.py <pdf_file> [output.json]")
+        print("       python docling_extractor.py <pdf_dir> [output_dir]")
         sys.exit(1)
     
     pdf_file = sys.argv[1]
+    
+    if Path(pdf_file).is_dir():
+        # Batch: one JSON per PDF, several documents converted at once
+        output_dir = Path(sys.argv[2] if len(sys.argv) > 2 else "output_docling")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        extractor = DoclingExtractor(verbose=True)
+        pdf_paths = sorted(Path(pdf_file).glob('*.pdf'))
+        for result in extractor.extract_batch(pdf_paths):
+            output = dict(result, method='docling')
+            with open(output_dir / (Path(result['pdf_path']).stem + '.json'), 'w') as f:
+                json.dump(output, f, indent=2)
+        print(f"Saved to {output_dir}")
+        return
+    
     output_file = sys.argv[2] if len(sys.argv) > 2 else "output_docling.json"
     
     extractor = DoclingExtractor(verbose=True)
@@ -3,238 +3,798 @@
 PDF Table Extraction using Table Transformer (Microsoft)
 """
 import json
+import multiprocessing
+import os
+import queue
+import threading
 from pathlib import Path
-from typing import List, Dict, Any
+from types import SimpleNamespace
+from typing import List, Dict, Any, Iterator, Iterable, Callable, Tuple, Union
 import time
 
+from methods.deep_learning.text_layer import WordGrid, fill_cells
+from methods.json_writer import write_tables_json
+from methods.page_index import resolve_pages
+from methods.pdf_source import PdfInput, pdf_source, pdf_name
+from methods.profiling import current_rss_mb, private_rss_mb
+from methods.regions import BBox, pixels_to_points, from_cropbox
+
 try:
     from transformers import AutoImageProcessor, TableTransformerForObjectDetection
     from pdf2image import convert_from_path
+    import pdfplumber
+    import pypdfium2 as pdfium
     import torch
     from PIL import Image
     TT_AVAILABLE = True
 except ImportError:
     TT_AVAILABLE = False
 
+try:
+    import onnxruntime as ort
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+DETECTION_MODEL = "microsoft/table-transformer-detection"
+STRUCTURE_MODEL = "microsoft/table-transformer-structure-recognition"
+
+# Inference backends: eager fp32 PyTorch, dynamic int8 quantization of the
+# Linear layers, and an ONNX Runtime graph exported once and cached
+BACKENDS = ('eager', 'int8', 'onnx')
+DEFAULT_ONNX_DIR = Path.home() / '.cache' / 'pdf-to-json-benchmark' / 'onnx'
+
+# Margin (points) added around a detected table before it is re-rendered,
+# so borders and edge text cut off by a low-resolution box are kept
+REGION_PADDING = 4.0
+
+
+def export_onnx(model, processor, path: Path):
+    """
+    Export a Table Transformer model to ONNX
+    
+    Batch size and image height/width are dynamic axes, so one export
+    serves every padded batch.
+    """
+    class Exportable(torch.nn.Module):
+        # ONNX takes tensors out, not the HF output dataclass
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+        
+        def forward(self, pixel_values, pixel_mask):
+            outputs = self.model(pixel_values=pixel_values, pixel_mask=pixel_mask)
+            return outputs.logits, outputs.pred_boxes
+    
+    sample = processor(images=[Image.new('RGB', (850, 1100), 'white')] * 2, return_tensors="pt")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    torch.onnx.export(
+        Exportable(model).eval(),
+        (sample['pixel_values'], sample['pixel_mask']),
+        str(path),
+        input_names=['pixel_values', 'pixel_mask'],
+        output_names=['logits', 'pred_boxes'],
+        dynamic_axes={
+            'pixel_values': {0: 'batch', 2: 'height', 3: 'width'},
+            'pixel_mask': {0: 'batch', 1: 'height', 2: 'width'},
+            'logits': {0: 'batch'},
+            'pred_boxes': {0: 'batch'},
+        },
+        opset_version=17,
+    )
+
+
+def load_model(model_name: str, device: str, backend: str) -> Tuple[Any, Any]:
+    """Load a processor and model, quantized when the backend is int8"""
+    processor = AutoImageProcessor.from_pretrained(model_name)
+    model = TableTransformerForObjectDetection.from_pretrained(model_name).to(device).eval()
+    
+    if backend == 'int8':
+        # int8 weights for every Linear layer (the transformer and heads);
+        # activations are quantized on the fly. The CNN backbone stays fp32.
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear},
+                                                    dtype=torch.qint8, inplace=True)
+    return processor, model
+
+
+# Models loaded in this process, reused by every extractor created with
+# shared_models=True and inherited copy-on-write by forked workers
+_shared_models = {}
+
+
+def shared_model(model_name: str, device: str, backend: str) -> Tuple[Any, Any]:
+    """
+    Load a model once per process and return the same instance afterwards
+    
+    Inference never writes to the weights, so after a fork every worker
+    keeps reading the parent's physical pages.
+    """
+    key = (model_name, device, backend)
+    if key not in _shared_models:
+        _shared_models[key] = load_model(model_name, device, backend)
+    return _shared_models[key]
+
+
+# Extractor of forked batch workers: the parent's own instance, inherited
+# with its loaded models rather than rebuilt in each worker
+_batch_extractor = None
+_worker_startup = None
+
+
+def _init_batch_worker(pool_start: float, threads: int):
+    global _worker_startup
+    torch.set_num_threads(threads)
+    _batch_extractor.verbose = False
+    _worker_startup = {
+        'startup_time': time.time() - pool_start,
+        'startup_rss_mb': current_rss_mb(),
+        'startup_private_mb': private_rss_mb(),
+    }
+
+
+def _batch_extract(job: tuple) -> Dict[str, Any]:
+    """Extract one file of a batch in a worker; errors are returned, not raised"""
+    pdf_path, pages = job
+    start = time.time()
+    try:
+        tables = list(_batch_extractor.iter_tables(pdf_path, pages=pages))
+        error = None
+    except Exception as e:
+        tables, error = [], str(e)
+    
+    return {
+        'pdf_path': pdf_path,
+        'tables': tables,
+        'num_tables': len(tables),
+        'extraction_time': time.time() - start,
+        'worker_pid': os.getpid(),
+        'worker': dict(_worker_startup, rss_mb=current_rss_mb(), private_mb=private_rss_mb()),
+        'error': error
+    }
+
+
 class TableTransformerExtractor:
     """Extract tables from PDF using Table Transformer model"""
     
-    def __init__(self, verbose: bool = True, device: str = None):
+    def __init__(self, verbose: bool = True, device: str = None, batch_size: int = 4,
+                 render_threads: int = 2, queue_depth: int = 2, backend: str = 'eager',
+                 intra_op_threads: int = None, inter_op_threads: int = None,
+                 onnx_dir: str = None, shared_models: bool = False,
+                 detection_dpi: int = 100, structure_dpi: int = 200):
+        """
+        Args:
+            verbose: Print progress
+            device: 'cuda' or 'cpu' (auto-detected when None)
+            batch_size: Page images per detection pass and table crops per
+                        structure pass
+            render_threads: pdftoppm processes rendering each batch of pages
+            queue_depth: Rendered batches waiting for the models; bounds
+                         memory at queue_depth * batch_size page images
+            backend: 'eager' (fp32 PyTorch), 'int8' (dynamic quantization
+                     of Linear layers) or 'onnx' (ONNX Runtime); int8 and
+                     onnx run on CPU
+            intra_op_threads: Threads inside one operator (None = library
+                              default, usually one per core)
+            inter_op_threads: Operators run in parallel (None = default)
+            onnx_dir: Where exported ONNX models are cached
+            shared_models: Reuse models already loaded in this process
+                           (see shared_model) instead of loading a copy
+            detection_dpi: Resolution of the page images for detection; the
+                           processor downsizes pages to about 800 px anyway
+            structure_dpi: Resolution at which detected tables are
+                           re-rendered for structure recognition
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend} (expected one of {BACKENDS})")
+        start_time = time.time()
         self.verbose = verbose
         self.extraction_time = 0
+        self.batch_size = max(1, batch_size)
+        self.render_threads = max(1, render_threads)
+        self.queue_depth = max(1, queue_depth)
+        self.render_wait = 0
+        self.render_time = 0
+        self.region_render_time = 0
+        self.batch_stats = []
+        # Whole pages are rendered at detection_dpi and only table regions at
+        # structure_dpi; boxes convert to PDF points with 72 / dpi
+        self.detection_dpi = detection_dpi
+        self.structure_dpi = structure_dpi
+        self.backend = backend
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.onnx_dir = Path(onnx_dir) if onnx_dir else DEFAULT_ONNX_DIR
         
         if not TT_AVAILABLE:
             raise ImportError("Table Transformer dependencies not installed. "
-                            "Run: uv pip install transformers[torch] pdf2image")
+                            "Run: uv pip install transformers[torch] pdf2image pypdfium2 pdfplumber")
+        if backend == 'onnx' and not ORT_AVAILABLE:
+            raise ImportError("ONNX backend needs onnxruntime. "
+                              "Run: uv pip install onnx onnxruntime")
         
         # Auto-detect device
         if device is None:
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
         else:
             self.device = device
+        if backend != 'eager' and self.device != 'cpu':
+            if self.verbose:
+                print(f"  {backend} backend runs on CPU; ignoring device {self.device}")
+            self.device = 'cpu'
+        
+        self._set_threads()
         
         if self.verbose:
-            print(f"Initializing Table Transformer (device: {self.device})...")
-        
-        # Load detection model
-        self.detection_processor = AutoImageProcessor.from_pretrained(
-            "microsoft/table-transformer-detection"
-        )
-        self.detection_model = TableTransformerForObjectDetection.from_pretrained(
-            "microsoft/table-transformer-detection"
-        ).to(self.device)
-        
-        # Load structure recognition model
-        self.structure_processor = AutoImageProcessor.from_pretrained(
-            "microsoft/table-transformer-structure-recognition"
-        )
-        self.structure_model = TableTransformerForObjectDetection.from_pretrained(
-            "microsoft/table-transformer-structure-recognition"  
-        ).to(self.device)
+            print(f"Initializing Table Transformer (device: {self.device}, backend: {backend})...")
+        
+        # Load detection and structure recognition models
+        load = shared_model if shared_models else load_model
+        self.detection_processor, self.detection_model = load(DETECTION_MODEL, self.device, backend)
+        self.structure_processor, self.structure_model = load(STRUCTURE_MODEL, self.device, backend)
+        
+        self.detection_forward = self._make_forward(DETECTION_MODEL, self.detection_model,
+                                                    self.detection_processor)
+        self.structure_forward = self._make_forward(STRUCTURE_MODEL, self.structure_model,
+                                                    self.structure_processor)
+        
+        self.startup_time = time.time() - start_time
+        self.startup_rss_mb = current_rss_mb()
+        self.worker_stats = {}
         
         if self.verbose:
-            print("Models loaded successfully!")
+            print(f"Models loaded in {self.startup_time:.2f}s "
+                  f"(RSS {self.startup_rss_mb:.0f} MB)")
+    
+    def _set_threads(self):
+        """Apply the intra-/inter-op thread settings to this process's PyTorch"""
+        if self.intra_op_threads:
+            torch.set_num_threads(self.intra_op_threads)
+        if self.inter_op_threads:
+            try:
+                torch.set_num_interop_threads(self.inter_op_threads)
+            except RuntimeError:
+                # Settable once per process, before any parallel work
+                if self.verbose:
+                    print("  Inter-op threads already fixed in this process; keeping them")
+    
+    def _make_forward(self, model_name: str, model, processor):
+        """
+        Forward function for one model on the selected backend
+        
+        Every backend returns outputs with .logits and .pred_boxes, which
+        is all post_process_object_detection reads.
+        """
+        if self.backend == 'onnx':
+            path = self.onnx_dir / f"{model_name.split('/')[-1]}.onnx"
+            if not path.exists():
+                if self.verbose:
+                    print(f"  Exporting {model_name} to {path}...")
+                export_onnx(model, processor, path)
+            
+            options = ort.SessionOptions()
+            if self.intra_op_threads:
+                options.intra_op_num_threads = self.intra_op_threads
+            if self.inter_op_threads:
+                options.inter_op_num_threads = self.inter_op_threads
+                options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+            
+            # Sessions own thread pools, which do not survive a fork: each
+            # process opens its own on first use
+            sessions = {}
+            
+            def forward(inputs):
+                session = sessions.get(os.getpid())
+                if session is None:
+                    session = sessions[os.getpid()] = ort.InferenceSession(
+                        str(path), options, providers=['CPUExecutionProvider'])
+                logits, pred_boxes = session.run(None, {
+                    'pixel_values': inputs['pixel_values'].numpy(),
+                    'pixel_mask': inputs['pixel_mask'].numpy(),
+                })
+                return SimpleNamespace(logits=torch.from_numpy(logits),
+                                       pred_boxes=torch.from_numpy(pred_boxes))
+            
+            return forward
+        
+        def forward(inputs):
+            with torch.no_grad():
+                return model(**inputs)
+        
+        return forward
     
-    def pdf_to_image(self, pdf_path: str, page_num: int = 1) -> Image.Image:
-        """Convert PDF page to PIL Image"""
-        images = convert_from_path(pdf_path, first_page=page_num, last_page=page_num, dpi=200)
+    def pdf_to_image(self, pdf_path: str, page_num: int = 1, dpi: int = None) -> Image.Image:
+        """Convert PDF page to PIL Image (at structure_dpi by default)"""
+        # CropBox, like pypdfium2 in render_region, so boxes map between the two
+        images = convert_from_path(pdf_path, first_page=page_num, last_page=page_num,
+                                   dpi=dpi or self.structure_dpi, use_cropbox=True)
         
         if not images:
             raise ValueError(f"Could not convert page {page_num}")
         
         return images[0]
     
-    def detect_tables(self, image: Image.Image, confidence_threshold: float = 0.7) -> List[Dict]:
-        """Detect table regions in image"""
-        # Prepare image
-        inputs = self.detection_processor(images=image, return_tensors="pt").to(self.device)
+    def _batches(self, images: List[Image.Image]) -> List[List[int]]:
+        """
+        Group image indices into batches of similar shape
         
-        # Run detection
-        with torch.no_grad():
-            outputs = self.detection_model(**inputs)
+        The processor resizes every image to a fixed shortest edge and pads
+        a batch to its largest member, so images with close aspect ratios
+        waste the least compute on padding.
+        """
+        order = sorted(range(len(images)), key=lambda i: images[i].height / images[i].width)
+        return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+    
+    def _run_batches(self, stage: str, images: List[Image.Image], processor, forward,
+                     threshold: float) -> List[Dict]:
+        """
+        Run a model's forward function over images in padded, shape-bucketed batches
         
-        # Post-process
-        target_sizes = torch.tensor([image.size[::-1]]).to(self.device)
-        results = self.detection_processor.post_process_object_detection(
-            outputs, threshold=confidence_threshold, target_sizes=target_sizes
-        )[0]
+        Returns:
+            Post-processed detections per image, in input order
+        """
+        results = [None] * len(images)
         
-        # Extract table bboxes
-        tables = []
-        for score, label, box in zip(results["scores"], results["labels"], results["boxes"]):
-            if self.detection_model.config.id2label[label.item()] == "table":
-                tables.append({
-                    "bbox": box.cpu().tolist(),
-                    "confidence": score.item()
-                })
+        for batch in self._batches(images):
+            batch_images = [images[i] for i in batch]
+            start = time.time()
+            
+            # Padded to the largest image in the batch, with a pixel mask
+            inputs = processor(images=batch_images, return_tensors="pt").to(self.device)
+            
+            outputs = forward(inputs)
+            
+            target_sizes = torch.tensor([image.size[::-1] for image in batch_images]).to(self.device)
+            batch_results = processor.post_process_object_detection(
+                outputs, threshold=threshold, target_sizes=target_sizes
+            )
+            
+            self.batch_stats.append({
+                'stage': stage,
+                'size': len(batch),
+                'latency': time.time() - start,
+            })
+            for i, result in zip(batch, batch_results):
+                results[i] = result
+        
+        return results
+    
+    def detect_tables_batch(self, images: List[Image.Image],
+                            confidence_threshold: float = 0.7) -> List[List[Dict]]:
+        """Detect table regions in several page images, batch_size at a time"""
+        results = self._run_batches('detection', images, self.detection_processor,
+                                    self.detection_forward, confidence_threshold)
         
-        return tables
+        # Extract table bboxes
+        id2label = self.detection_model.config.id2label
+        return [[{"bbox": box.cpu().tolist(), "confidence": score.item()}
+                 for score, label, box in zip(r["scores"], r["labels"], r["boxes"])
+                 if id2label[label.item()] == "table"]
+                for r in results]
     
-    def recognize_structure(self, image: Image.Image, table_bbox: List[float]) -> Dict:
-        """Recognize table structure within detected region"""
-        # Crop to table region
-        x1, y1, x2, y2 = [int(coord) for coord in table_bbox]
-        table_img = image.crop((x1, y1, x2, y2))
+    def pdf_to_images(self, pdf_path: str, page_nums: List[int]) -> List[Image.Image]:
+        """Render pages at detection_dpi, one pdftoppm run per consecutive range"""
+        images = []
+        start = 0
+        while start < len(page_nums):
+            end = start + 1
+            while end < len(page_nums) and page_nums[end] == page_nums[end - 1] + 1:
+                end += 1
+            
+            # CropBox, like pypdfium2 in render_region: detected boxes are
+            # scaled to points and re-rendered there
+            images.extend(convert_from_path(pdf_path, first_page=page_nums[start],
+                                            last_page=page_nums[end - 1], dpi=self.detection_dpi,
+                                            thread_count=self.render_threads, use_cropbox=True))
+            start = end
         
-        # Prepare image
-        inputs = self.structure_processor(images=table_img, return_tensors="pt").to(self.device)
+        if len(images) != len(page_nums):
+            raise ValueError(f"Could not convert pages {page_nums[0]}-{page_nums[-1]}")
         
-        # Run structure recognition
-        with torch.no_grad():
-            outputs = self.structure_model(**inputs)
+        return images
+    
+    def _render_batches(self, pdf_path: str,
+                        page_nums: List[int]) -> Iterator[Tuple[List[int], List[Image.Image]]]:
+        """
+        Yield (pages, images) batches rendered ahead in a background thread
         
-        # Post-process
-        target_sizes = torch.tensor([table_img.size[::-1]]).to(self.device)
-        results = self.structure_processor.post_process_object_detection(
-            outputs, threshold=0.6, target_sizes=target_sizes
-        )[0]
+        The renderer fills a bounded queue while the caller runs the models,
+        so rasterization (pdftoppm subprocesses, outside the GIL) overlaps
+        with inference and at most queue_depth batches are held in memory.
+        Rendering errors are re-raised here, in the caller.
+        """
+        batches = queue.Queue(maxsize=self.queue_depth)
+        stop = threading.Event()
+        done = object()
+        
+        def put(item) -> bool:
+            # Wait for room, but give up once the consumer has gone away
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def render():
+            try:
+                for start in range(0, len(page_nums), self.batch_size):
+                    batch_pages = page_nums[start:start + self.batch_size]
+                    render_start = time.time()
+                    images = self.pdf_to_images(pdf_path, batch_pages)
+                    self.render_time += time.time() - render_start
+                    if not put((batch_pages, images)):
+                        return
+            except Exception as e:
+                put(e)
+                return
+            put(done)
+        
+        renderer = threading.Thread(target=render, name='tt-render', daemon=True)
+        renderer.start()
+        try:
+            while True:
+                wait_start = time.time()
+                item = batches.get()
+                self.render_wait += time.time() - wait_start
+                
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            renderer.join()
+    
+    def detect_tables(self, image: Image.Image, confidence_threshold: float = 0.7) -> List[Dict]:
+        """Detect table regions in image"""
+        return self.detect_tables_batch([image], confidence_threshold)[0]
+    
+    def recognize_structure_batch(self, table_images: List[Image.Image]) -> List[Dict]:
+        """Recognize the structure of several cropped tables, batch_size at a time"""
+        results = self._run_batches('structure', table_images, self.structure_processor,
+                                    self.structure_forward, 0.6)
+        
+        id2label = self.structure_model.config.id2label
+        structures = []
+        for r in results:
+            # Extract cells, rows, columns
+            cells = []
+            rows = []
+            columns = []
+            
+            for score, label, box in zip(r["scores"], r["labels"], r["boxes"]):
+                obj_type = id2label[label.item()]
+                bbox = box.cpu().tolist()
+                
+                if obj_type == "table row":
+                    rows.append({"bbox": bbox, "confidence": score.item()})
+                elif obj_type == "table column":
+                    columns.append({"bbox": bbox, "confidence": score.item()})
+                elif obj_type in ["table", "table cell"]:
+                    cells.append({"bbox": bbox, "confidence": score.item()})
+            
+            structures.append({
+                "rows": rows,
+                "columns": columns,
+                "cells": cells
+            })
+        
+        return structures
+    
+    def render_region(self, document, page_num: int, bbox: BBox) -> Tuple[Image.Image, BBox]:
+        """
+        Render one region of a page at structure_dpi
         
-        # Extract cells, rows, columns
-        cells = []
-        rows = []
-        columns = []
+        Only the region is rasterized, so a table costs a fraction of a
+        full high-resolution page.
         
-        for score, label, box in zip(results["scores"], results["labels"], results["boxes"]):
-            obj_type = self.structure_model.config.id2label[label.item()]
-            bbox = box.cpu().tolist()
+        Args:
+            document: Open pypdfium2 document
+            page_num: Page number (1-based)
+            bbox: Region in PDF points (x0, top, x1, bottom)
             
-            if obj_type == "table row":
-                rows.append({"bbox": bbox, "confidence": score.item()})
-            elif obj_type == "table column":
-                columns.append({"bbox": bbox, "confidence": score.item()})
-            elif obj_type in ["table", "table cell"]:
-                cells.append({"bbox": bbox, "confidence": score.item()})
-        
-        return {
-            "rows": rows,
-            "columns": columns,
-            "cells": cells
-        }
+        Returns:
+            (image, region rendered in points: padded and clipped to the page)
+        """
+        page = document[page_num - 1]
+        width, height = page.get_size()
+        x0, top, x1, bottom = bbox
+        x0, top = max(0.0, x0 - REGION_PADDING), max(0.0, top - REGION_PADDING)
+        x1, bottom = min(width, x1 + REGION_PADDING), min(height, bottom + REGION_PADDING)
+        
+        # crop trims (left, bottom, right, top) points off the displayed page
+        image = page.render(scale=self.structure_dpi / 72,
+                            crop=(x0, height - bottom, width - x1, top)).to_pil()
+        page.close()
+        return image.convert('RGB'), (x0, top, x1, bottom)
+    
+    @staticmethod
+    def crop_table(image: Image.Image, table_bbox: List[float]) -> Image.Image:
+        """Crop a detected table region out of its page image"""
+        x1, y1, x2, y2 = [int(coord) for coord in table_bbox]
+        return image.crop((x1, y1, x2, y2))
+    
+    def recognize_structure(self, image: Image.Image, table_bbox: List[float]) -> Dict:
+        """Recognize table structure within detected region"""
+        return self.recognize_structure_batch([self.crop_table(image, table_bbox)])[0]
     
-    def structure_to_table(self, structure: Dict, image: Image.Image) -> List[List[str]]:
-        """Convert structure recognition to 2D table array"""
-        # This is a simplified version - actual implementation would use OCR
-        # For now, return placeholder based on detected structure
+    def batch_summary(self) -> Dict[str, Any]:
+        """Per-stage batch count, items, and latency (mean/max seconds per batch)"""
+        summary = {}
+        for stage in ('detection', 'structure'):
+            stats = [b for b in self.batch_stats if b['stage'] == stage]
+            if not stats:
+                continue
+            latencies = [b['latency'] for b in stats]
+            items = sum(b['size'] for b in stats)
+            summary[stage] = {
+                'batches': len(stats),
+                'items': items,
+                'mean_latency': sum(latencies) / len(latencies),
+                'max_latency': max(latencies),
+                'items_per_second': items / sum(latencies) if sum(latencies) > 0 else 0,
+            }
+        return summary
+    
+    def structure_to_table(self, structure: Dict, region: BBox,
+                           words: WordGrid) -> List[List[str]]:
+        """
+        Convert structure recognition to a 2D table of cell text
         
-        rows = structure['rows']
-        columns = structure['columns']
+        Rows and columns are detected in region pixels; they are mapped to
+        page points and each intersection is filled from the page's text
+        layer. Pages without a text layer (scans) give empty cells.
         
-        num_rows = len(rows) if rows else 1
-        num_cols = len(columns) if columns else 1
+        Args:
+            structure: Output of recognize_structure_batch
+            region: Page region the structure image shows, in points
+                    (as returned by render_region, moved to the text
+                    layer's coordinates with from_cropbox)
+            words: Word index of the table's page
+        """
+        scale = 72.0 / self.structure_dpi
+        left, top = region[0], region[1]
+        
+        def to_points(bbox):
+            x0, y0, x1, y1 = bbox
+            return (x0 * scale + left, y0 * scale + top,
+                    x1 * scale + left, y1 * scale + top)
         
-        # Create placeholder table
-        table = []
-        for r in range(num_rows):
-            row = [f"Cell({r},{c})" for c in range(num_cols)]
-            table.append(row)
+        # With no rows (or columns) detected, the table is one row (or column)
+        whole = tuple(region)
+        rows = [to_points(row['bbox']) for row in structure['rows']] or [whole]
+        columns = [to_points(col['bbox']) for col in structure['columns']] or [whole]
         
-        return table
+        return fill_cells(words, rows, columns)
     
-    def extract_tables(self, pdf_path: str, pages: str = 'all') -> List[Dict[str, Any]]:
+    def iter_tables(self, pdf_path: PdfInput, pages: str = 'all') -> Iterator[Dict[str, Any]]:
         """
-        Extract tables from PDF using Table Transformer
+        Yield tables page by page as each page is recognized
+        
+        Errors propagate to the caller; use extract_tables for the
+        error-handling wrapper.
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object
             pages: Pages to process ('all' or page numbers)
             
-        Returns:
-            List of extracted tables with metadata
+        Yields:
+            Table dictionaries, in page order
         """
         start_time = time.time()
-        tables = []
+        self.batch_stats = []
+        self.render_wait = 0
+        self.render_time = 0
+        self.region_render_time = 0
         
-        if self.verbose:
-            print(f"Processing {Path(pdf_path).name} with Table Transformer")
-        
-        try:
-            # Process first page
-            page_num = 1
-            
-            if self.verbose:
-                print(f"  Converting page {page_num} to image...")
-            
-            image = self.pdf_to_image(pdf_path, page_num)
-            
-            # Detect tables
-            if self.verbose:
-                print(f"  Detecting tables...")
-            
-            detected_tables = self.detect_tables(image)
-            
+        with pdf_source(pdf_path) as source:
             if self.verbose:
-                print(f"  Found {len(detected_tables)} tables")
+                print(f"Processing {Path(source.name).name} with Table Transformer")
             
-            # Process each detected table
-            for idx, table_info in enumerate(detected_tables):
-                if self.verbose:
-                    print(f"  Recognizing structure for table {idx}...")
-                
-                structure = self.recognize_structure(image, table_info['bbox'])
-                table_data = self.structure_to_table(structure, image)
-                
-                result = {
-                    'page': page_num,
-                    'table_index': idx,
-                    'data': table_data,
-                    'num_rows': len(table_data),
-                    'num_cols': len(table_data[0]) if table_data else 0,
-                    'confidence': table_info['confidence'],
-                    'structure': {
-                        'rows_detected': len(structure['rows']),
-                        'cols_detected': len(structure['columns']),
-                        'cells_detected': len(structure['cells'])
-                    }
-                }
-                tables.append(result)
+            # Cell text comes from the text layer of pages with tables, and
+            # detected tables are re-rendered from the PDF at structure_dpi
+            with pdfium.PdfDocument(source.path) as document, \
+                    pdfplumber.open(source.handle()) as pdf:
+                page_nums = resolve_pages(source, pages)
                 
-                if self.verbose:
-                    print(f"    Detected: {result['num_rows']}x{result['num_cols']} "
-                          f"(confidence: {table_info['confidence']:.2f})")
+                # Pages go through the models batch_size at a time while the
+                # next batches render; tables are still yielded in page order
+                for batch_pages, images in self._render_batches(source.path, page_nums):
+                    # Detect tables
+                    if self.verbose:
+                        print(f"  Detecting tables on pages {batch_pages[0]}-{batch_pages[-1]}...")
+                    
+                    detected = self.detect_tables_batch(images)
+                    
+                    # Re-render each detected table alone at full resolution
+                    region_start = time.time()
+                    crops = []
+                    for page_idx, page_tables in enumerate(detected):
+                        for table_info in page_tables:
+                            bbox = pixels_to_points(table_info['bbox'], self.detection_dpi)
+                            image, region = self.render_region(document, batch_pages[page_idx], bbox)
+                            crops.append((page_idx, table_info, bbox, region, image))
+                    self.region_render_time += time.time() - region_start
+                    
+                    if self.verbose:
+                        print(f"  Found {len(crops)} tables, recognizing structure...")
+                    
+                    # Recognize every table in the batch of pages together
+                    structures = self.recognize_structure_batch([crop[-1] for crop in crops])
+                    
+                    table_counts = {}
+                    word_grids = {}
+                    for (page_idx, table_info, bbox, region, _), structure in zip(crops, structures):
+                        page_num = batch_pages[page_idx]
+                        idx = table_counts.get(page_num, 0)
+                        table_counts[page_num] = idx + 1
+                        
+                        # Words are read and indexed once per page, with the
+                        # page's CropBox corner in pdfplumber's coordinates
+                        if page_num not in word_grids:
+                            page = pdf.pages[page_num - 1]
+                            word_grids[page_num] = (WordGrid(page.extract_words()),
+                                                    tuple(page.cropbox[:2]))
+                            page.close()
+                        words, origin = word_grids[page_num]
+                        
+                        # Detection and rendering measure from the CropBox,
+                        # the text layer and regions from the MediaBox
+                        bbox = from_cropbox(bbox, origin)
+                        table_data = self.structure_to_table(structure, from_cropbox(region, origin),
+                                                             words)
+                        
+                        result = {
+                            'page': page_num,
+                            'table_index': idx,
+                            'data': table_data,
+                            'num_rows': len(table_data),
+                            'num_cols': len(table_data[0]) if table_data else 0,
+                            'confidence': table_info['confidence'],
+                            # PDF points from the top-left, usable as regions
+                            'bbox': bbox,
+                            'structure': {
+                                'rows_detected': len(structure['rows']),
+                                'cols_detected': len(structure['columns']),
+                                'cells_detected': len(structure['cells'])
+                            }
+                        }
+                        
+                        if self.verbose:
+                            print(f"    Page {page_num}, table {idx}: {result['num_rows']}x{result['num_cols']} "
+                                  f"(confidence: {table_info['confidence']:.2f})")
+                        
+                        yield result
+        
+        self.extraction_time = time.time() - start_time
+    
+    def extract_tables(self, pdf_path: PdfInput, pages: str = 'all') -> List[Dict[str, Any]]:
+        """
+        Extract tables from PDF using Table Transformer
         
+        Args:
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object
+            pages: Pages to process ('all' or page numbers)
+            
+        Returns:
+            List of extracted tables with metadata
+        """
+        try:
+            tables = list(self.iter_tables(pdf_path, pages=pages))
         except Exception as e:
-            print(f"Error processing {pdf_path}: {e}")
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
             if self.verbose:
                 import traceback
                 traceback.print_exc()
             return []
         
-        self.extraction_time = time.time() - start_time
-        
         if self.verbose:
+            for stage, stats in self.batch_summary().items():
+                print(f"  {stage}: {stats['items']} items in {stats['batches']} batches, "
+                      f"{stats['mean_latency']:.3f}s mean / {stats['max_latency']:.3f}s max per batch")
+            # Time the models sat idle waiting for pages to render
+            print(f"  Rendering: pages {self.render_time:.2f}s at {self.detection_dpi} dpi "
+                  f"(wait {self.render_wait:.2f}s), "
+                  f"tables {self.region_render_time:.2f}s at {self.structure_dpi} dpi")
             print(f"Extracted {len(tables)} tables in {self.extraction_time:.2f}s\n")
         
         return tables
     
+    def extract_batch(self, pdf_paths: Iterable[str],
+                      pages: Union[str, Callable[[str], str]] = 'all',
+                      workers: int = 1,
+                      threads_per_worker: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Extract many PDFs in forked workers sharing this extractor's models
+        
+        Workers are forked after the models are loaded, so each starts in
+        well under a second and reads the parent's weights copy-on-write
+        instead of loading its own copy. Results come back in input order.
+        Startup time and memory of every worker are kept in worker_stats
+        (private_mb excludes the shared weights; rss_mb counts them).
+        
+        Args:
+            pdf_paths: PDF file paths
+            pages: Pages spec for every file, or a function of the path
+                   (e.g. TablePageIndex.pages_for)
+            workers: Worker processes
+            threads_per_worker: Torch threads per worker (default: the
+                                CPUs divided among the workers)
+            
+        Yields:
+            Per-file dicts: 'pdf_path', 'tables', 'num_tables',
+            'extraction_time', 'worker_pid', 'worker' (startup and current
+            memory of that worker) and 'error' (None on success)
+        """
+        global _batch_extractor
+        
+        if self.device != 'cpu':
+            raise RuntimeError("extract_batch forks its workers, which CUDA does not survive; "
+                               "use device='cpu'")
+        
+        workers = max(1, workers)
+        threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        page_spec = pages if callable(pages) else (lambda pdf_path: pages)
+        jobs = ((str(pdf_path), page_spec(str(pdf_path))) for pdf_path in pdf_paths)
+        
+        # Forked, not spawned: spawned workers would each load the models again
+        context = multiprocessing.get_context('fork')
+        start_time = time.time()
+        self.worker_stats = {}
+        count = 0
+        
+        _batch_extractor = self
+        try:
+            with context.Pool(processes=workers, initializer=_init_batch_worker,
+                              initargs=(start_time, threads)) as pool:
+                for result in pool.imap(_batch_extract, jobs):
+                    count += 1
+                    self.worker_stats[result['worker_pid']] = result['worker']
+                    if self.verbose:
+                        status = (f"{result['num_tables']} tables" if result['error'] is None
+                                  else f"error: {result['error']}")
+                        print(f"  [{count}] {Path(result['pdf_path']).name}: {status} "
+                              f"in {result['extraction_time']:.2f}s (pid {result['worker_pid']})")
+                    yield result
+        finally:
+            _batch_extractor = None
+        
+        self.extraction_time = time.time() - start_time
+        
+        if self.verbose:
+            for pid, stats in self.worker_stats.items():
+                print(f"  Worker {pid}: started in {stats['startup_time']:.2f}s, "
+                      f"RSS {stats['rss_mb']:.0f} MB, private {stats['private_mb']:.0f} MB")
+            print(f"  Parent model load: {self.startup_time:.2f}s, RSS {self.startup_rss_mb:.0f} MB")
+            print(f"Processed {count} files in {self.extraction_time:.2f}s\n")
+    
+    def _json_metadata(self) -> Dict[str, Any]:
+        """Run metadata written alongside the tables (tables_to_json, extract_to_file)"""
+        return {
+            'extraction_time': self.extraction_time,
+            'method': 'table_transformer',
+            'device': self.device,
+            'backend': self.backend,
+            'batch_size': self.batch_size,
+            'batches': self.batch_summary(),
+            'render_wait': self.render_wait,
+            'detection_dpi': self.detection_dpi,
+            'structure_dpi': self.structure_dpi,
+            'render_time': self.render_time,
+            'region_render_time': self.region_render_time
+        }
+    
     def tables_to_json(self, tables: List[Dict[str, Any]], 
                        include_metadata: bool = True) -> str:
         """Convert extracted tables to JSON format"""
         if include_metadata:
             output = {
                 'num_tables': len(tables),
-                'extraction_time': self.extraction_time,
-                'method': 'table_transformer',
-                'device': self.device,
+                **self._json_metadata(),
                 'tables': tables
             }
         else:
@@ -242,19 +802,19 @@ class TableTransformerExtractor:
         
         return json.dumps(output, indent=2, default=str)
     
-    def extract_to_file(self, pdf_path: str, output_path: str):
+    def extract_to_file(self, pdf_path: PdfInput, output_path: str, pages: str = 'all'):
         """Extract tables and save to JSON file"""
-        tables = self.extract_tables(pdf_path)
-        json_output = self.tables_to_json(tables)
-        
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w') as f:
-            f.write(json_output)
+        # Each table is written as soon as its page is done, the metadata
+        # once the iterator finishes
+        tables = self.iter_tables(pdf_path, pages=pages)
+        try:
+            num_tables = write_tables_json(output_path, tables, final_metadata=self._json_metadata)
+        except Exception as e:
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
+            return
         
         if self.verbose:
-            print(f"Saved to {output_file}")
+            print(f"Saved {num_tables} tables to {output_path}")
 
 def main():
     """Example usage"""
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Cell text for image-based table models from the PDF text layer
+
+Table Transformer finds rows and columns on a rendered page image but
+reads no text. For born-digital PDFs the words are already in the text
+layer: WordGrid indexes a page's words by position once, and fill_cells
+looks up each row x column intersection in it, so filling a table costs
+about one grid lookup per cell instead of a scan of every word per cell.
+"""
+from collections import defaultdict
+from typing import List, Dict, Any, Sequence, Tuple
+
+BBox = Tuple[float, float, float, float]
+
+
+class WordGrid:
+    """Uniform-grid spatial index over a page's words (by word center)"""
+
+    def __init__(self, words: List[Dict[str, Any]], cell_size: float = 24.0):
+        """
+        Args:
+            words: pdfplumber words (x0, top, x1, bottom in points), in
+                   reading order
+            cell_size: Grid cell edge in points; about two text lines
+        """
+        self.words = words
+        self.cell_size = cell_size
+        self.buckets = defaultdict(list)
+
+        for i, word in enumerate(words):
+            cx = (word['x0'] + word['x1']) / 2
+            cy = (word['top'] + word['bottom']) / 2
+            self.buckets[(int(cx // cell_size), int(cy // cell_size))].append(i)
+
+    def query(self, bbox: BBox) -> List[int]:
+        """Indices of words whose center lies inside bbox, in reading order"""
+        x0, top, x1, bottom = bbox
+        size = self.cell_size
+        found = []
+
+        for gx in range(int(x0 // size), int(x1 // size) + 1):
+            for gy in range(int(top // size), int(bottom // size) + 1):
+                for i in self.buckets.get((gx, gy), ()):
+                    word = self.words[i]
+                    cx = (word['x0'] + word['x1']) / 2
+                    cy = (word['top'] + word['bottom']) / 2
+                    if x0 <= cx <= x1 and top <= cy <= bottom:
+                        found.append(i)
+
+        found.sort()
+        return found
+
+    def text(self, indices: List[int]) -> str:
+        """Join the given words with spaces"""
+        return ' '.join(self.words[i]['text'] for i in indices)
+
+
+def fill_cells(grid: WordGrid, row_bboxes: Sequence[BBox],
+               col_bboxes: Sequence[BBox]) -> List[List[str]]:
+    """
+    Text of every row x column intersection, rows top to bottom
+
+    Detected rows (or columns) can overlap; a word goes to the first cell
+    that claims it so no text is repeated.
+
+    Args:
+        grid: Index over the page's words
+        row_bboxes: Row boxes in page points
+        col_bboxes: Column boxes in page points
+
+    Returns:
+        2D list of cell strings ('' for empty cells)
+    """
+    rows = sorted(row_bboxes, key=lambda b: b[1])
+    cols = sorted(col_bboxes, key=lambda b: b[0])
+    used = set()
+    table = []
+
+    for row in rows:
+        cells = []
+        for col in cols:
+            indices = [i for i in grid.query((col[0], row[1], col[2], row[3]))
+                       if i not in used]
+            used.update(indices)
+            cells.append(grid.text(indices))
+        table.append(cells)
+
+    return table
@@ -5,10 +5,14 @@ Uses fast layout detection then GPT-4 for content extraction
 """
 import json
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 import time
 import os
 
+from methods.json_writer import write_tables_json
+from methods.page_index import resolve_pages
+from methods.pdf_source import PdfInput, pdf_source, pdf_name
+
 try:
     from openai import OpenAI
     from pdf2image import convert_from_path
@@ -26,6 +30,7 @@ class LayoutGPT4Extractor:
         self.verbose = verbose
         self.extraction_time = 0
         self.total_cost = 0
+        self.page_errors = {}
         
         if not HYBRID_AVAILABLE:
             raise ImportError("Dependencies not installed. Run: uv pip install openai pdf2image pillow")
@@ -108,6 +113,12 @@ Be precise with numbers and text."""
             temperature=0
         )
         
+        # Calculate cost; charged before parsing, a bad response is still paid for
+        input_tokens = response.usage.prompt_tokens
+        output_tokens = response.usage.completion_tokens
+        cost = (input_tokens * 2.5 / 1_000_000) + (output_tokens * 10 / 1_000_000)
+        self.total_cost += cost
+        
         content = response.choices[0].message.content
         
         # Extract JSON
@@ -118,107 +129,136 @@ Be precise with numbers and text."""
         
         result = json.loads(content)
         
-        # Calculate cost
-        input_tokens = response.usage.prompt_tokens
-        output_tokens = response.usage.completion_tokens
-        cost = (input_tokens * 2.5 / 1_000_000) + (output_tokens * 10 / 1_000_000)
-        
         return {
             'data': result.get('data', []),
             'tokens': {'input': input_tokens, 'output': output_tokens},
             'cost': cost
         }
     
-    def extract_tables(self, pdf_path: str, pages: str = 'all') -> List[Dict[str, Any]]:
+    def iter_tables(self, pdf_path: PdfInput, pages: str = '1') -> Iterator[Dict[str, Any]]:
         """
-        Extract tables using hybrid approach
+        Yield tables page by page as each page's response is parsed
+        
+        A page or table region whose processing fails is reported,
+        recorded in page_errors and skipped; other errors propagate to the
+        caller (use extract_tables for the error-handling wrapper).
         
         Args:
-            pdf_path: Path to PDF file
-            pages: Pages to process
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object
+            pages: Pages to process ('all' or page numbers; default page 1,
+                   since every page is a paid request)
             
-        Returns:
-            List of extracted tables
+        Yields:
+            Table dictionaries, in page order
         """
         start_time = time.time()
-        tables = []
+        self.page_errors = {}
         
-        if self.verbose:
-            print(f"Processing {Path(pdf_path).name} with Hybrid (Layout + GPT-4)")
-        
-        try:
-            # Process first page
-            page_num = 1
-            
-            if self.verbose:
-                print(f"  Converting page to image...")
-            
-            image = self.pdf_to_image(pdf_path, page_num)
-            
-            # Step 1: Fast layout detection
-            if self.verbose:
-                print(f"  Detecting table regions...")
-            
-            regions = self.detect_table_regions(image)
-            
+        with pdf_source(pdf_path) as source:
             if self.verbose:
-                print(f"  Found {len(regions)} regions")
+                print(f"Processing {Path(source.name).name} with Hybrid (Layout + GPT-4)")
             
-            # Step 2: Extract content with GPT-4
-            for idx, region in enumerate(regions):
+            for page_num in resolve_pages(source, pages):
                 if self.verbose:
-                    print(f"  Extracting content from region {idx} with GPT-4...")
-                
-                # Crop and encode
-                image_b64 = self.crop_and_encode(image, region['bbox'])
-                
-                # Extract with GPT-4
-                result = self.extract_table_content(image_b64)
+                    print(f"  Converting page {page_num} to image...")
                 
-                table_data = result['data']
-                
-                table_info = {
-                    'page': page_num,
-                    'table_index': idx,
-                    'data': table_data,
-                    'num_rows': len(table_data),
-                    'num_cols': len(table_data[0]) if table_data else 0,
-                    'detection_confidence': region['confidence'],
-                    'tokens': result['tokens'],
-                    'cost': result['cost']
-                }
-                tables.append(table_info)
-                
-                self.total_cost += result['cost']
+                try:
+                    image = self.pdf_to_image(source.path, page_num)
+                    
+                    # Step 1: Fast layout detection
+                    if self.verbose:
+                        print(f"  Detecting table regions...")
+                    
+                    regions = self.detect_table_regions(image)
+                except Exception as e:
+                    print(f"  Error on page {page_num}: {e}")
+                    self.page_errors[page_num] = str(e)
+                    continue
                 
                 if self.verbose:
-                    print(f"    Extracted: {table_info['num_rows']}x{table_info['num_cols']}")
-                    print(f"    Cost: ${result['cost']:.4f}")
+                    print(f"  Found {len(regions)} regions")
+                
+                # Step 2: Extract content with GPT-4
+                for idx, region in enumerate(regions):
+                    if self.verbose:
+                        print(f"  Extracting content from region {idx} with GPT-4...")
+                    
+                    # Crop and encode
+                    image_b64 = self.crop_and_encode(image, region['bbox'])
+                    
+                    # Extract with GPT-4; a bad response must not discard the
+                    # regions already extracted and paid for
+                    try:
+                        result = self.extract_table_content(image_b64)
+                    except Exception as e:
+                        print(f"  Error on page {page_num}, region {idx}: {e}")
+                        self.page_errors.setdefault(page_num, str(e))
+                        continue
+                    
+                    table_data = result['data']
+                    
+                    table_info = {
+                        'page': page_num,
+                        'table_index': idx,
+                        'data': table_data,
+                        'num_rows': len(table_data),
+                        'num_cols': len(table_data[0]) if table_data else 0,
+                        'detection_confidence': region['confidence'],
+                        'tokens': result['tokens'],
+                        'cost': result['cost']
+                    }
+                    yield table_info
+                    
+                    if self.verbose:
+                        print(f"    Extracted: {table_info['num_rows']}x{table_info['num_cols']}")
+                        print(f"    Cost: ${result['cost']:.4f}")
+        
+        self.extraction_time = time.time() - start_time
+    
+    def extract_tables(self, pdf_path: PdfInput, pages: str = '1') -> List[Dict[str, Any]]:
+        """
+        Extract tables using hybrid approach
         
+        Args:
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object
+            pages: Pages to process ('all' or page numbers; default page 1,
+                   since every page is a paid request)
+            
+        Returns:
+            List of extracted tables
+        """
+        try:
+            tables = list(self.iter_tables(pdf_path, pages=pages))
         except Exception as e:
-            print(f"Error processing {pdf_path}: {e}")
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
             if self.verbose:
                 import traceback
                 traceback.print_exc()
             return []
         
-        self.extraction_time = time.time() - start_time
-        
         if self.verbose:
             print(f"Extracted {len(tables)} tables in {self.extraction_time:.2f}s")
             print(f"Total cost: ${self.total_cost:.4f}\n")
         
         return tables
     
+    def _json_metadata(self) -> Dict[str, Any]:
+        """Run metadata written alongside the tables (tables_to_json, extract_to_file)"""
+        return {
+            'extraction_time': self.extraction_time,
+            'method': 'hybrid_layout_gpt4',
+            'cost': self.total_cost
+        }
+    
     def tables_to_json(self, tables: List[Dict[str, Any]], 
                        include_metadata: bool = True) -> str:
         """Convert extracted tables to JSON format"""
         if include_metadata:
             output = {
                 'num_tables': len(tables),
-                'extraction_time': self.extraction_time,
-                'method': 'hybrid_layout_gpt4',
-                'cost': self.total_cost,
+                **self._json_metadata(),
                 'tables': tables
             }
         else:
@@ -226,34 +266,36 @@ Be precise with numbers and text."""
         
         return json.dumps(output, indent=2)
     
-    def extract_to_file(self, pdf_path: str, output_path: str):
-        """Extract tables and save to JSON file"""
-        tables = self.extract_tables(pdf_path)
-        json_output = self.tables_to_json(tables)
-        
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w') as f:
-            f.write(json_output)
+    def extract_to_file(self, pdf_path: PdfInput, output_path: str, pages: str = '1'):
+        """Extract tables and save to JSON file (page 1 unless pages is given)"""
+        # Each table is written as soon as its page is done, the metadata
+        # once the iterator finishes
+        tables = self.iter_tables(pdf_path, pages=pages)
+        try:
+            num_tables = write_tables_json(output_path, tables, final_metadata=self._json_metadata)
+        except Exception as e:
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
+            return
         
         if self.verbose:
-            print(f"Saved to {output_file}")
+            print(f"Saved {num_tables} tables to {output_path}")
 
 def main():
     """Example usage"""
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python layout_gpt4_extractor.py <pdf_file> [output.json]")
+        print("Usage: python layout_gpt4_extractor.py <pdf_file> [output.json] [pages]")
+        print("\nPages default to 1; each page is one paid API request ('all' for every page)")
         print("\nRequires OPENAI_API_KEY environment variable")
         sys.exit(1)
     
     pdf_file = sys.argv[1]
     output_file = sys.argv[2] if len(sys.argv) > 2 else "output_hybrid.json"
+    pages = sys.argv[3] if len(sys.argv) > 3 else '1'
     
     extractor = LayoutGPT4Extractor(verbose=True)
-    extractor.extract_to_file(pdf_file, output_file)
+    extractor.extract_to_file(pdf_file, output_file, pages=pages)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Incremental JSON output for iter_tables streams
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, Iterable, Callable, TextIO
+
+
+def stream_tables_json(tables: Iterable[Dict[str, Any]], f: TextIO,
+                       metadata: Dict[str, Any] = None,
+                       final_metadata: Callable[[], Dict[str, Any]] = None,
+                       include_metadata: bool = True) -> int:
+    """
+    Write tables to a JSON file as they arrive
+
+    Produces the same document shape as the extractors' tables_to_json,
+    but each table is serialized and written as soon as it is yielded,
+    so the full result never has to be held in memory.
+
+    Args:
+        tables: Table dicts, typically extractor.iter_tables(...)
+        f: Text file to write to
+        metadata: Fields known up front (e.g. 'method')
+        final_metadata: Called after the last table for fields only known
+                        at the end (e.g. extraction_time)
+        include_metadata: Write full table dicts and metadata, or only
+                          each table's 'data' (as tables_to_json does)
+
+    Returns:
+        Number of tables written
+    """
+    f.write('{\n  "tables": [')
+
+    count = 0
+    for table in tables:
+        item = table if include_metadata else table['data']
+        f.write(',\n    ' if count else '\n    ')
+        f.write(json.dumps(item, default=str))
+        count += 1
+
+    f.write('\n  ]' if count else ']')
+
+    if include_metadata:
+        tail = {'num_tables': count}
+        tail.update(metadata or {})
+        if final_metadata is not None:
+            tail.update(final_metadata())
+        for key, value in tail.items():
+            f.write(f',\n  {json.dumps(key)}: {json.dumps(value, default=str)}')
+
+    f.write('\n}\n')
+    return count
+
+
+def write_tables_json(output_path: str, tables: Iterable[Dict[str, Any]],
+                      metadata: Dict[str, Any] = None,
+                      final_metadata: Callable[[], Dict[str, Any]] = None,
+                      include_metadata: bool = True) -> int:
+    """
+    Stream tables into a JSON file with stream_tables_json
+
+    The parent directory is created, and the document is written to a
+    temp file that replaces output_path only once it is complete, so an
+    error part-way never leaves a truncated file behind.
+
+    Returns:
+        Number of tables written
+    """
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+
+    try:
+        with open(tmp_file, 'w') as f:
+            count = stream_tables_json(tables, f, metadata, final_metadata, include_metadata)
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
+    return count
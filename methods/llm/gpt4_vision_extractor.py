@@ -5,10 +5,14 @@ PDF Table Extraction using GPT-4 Vision
 import json
 import base64
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 import time
 import os
 
+from methods.json_writer import write_tables_json
+from methods.page_index import resolve_pages
+from methods.pdf_source import PdfInput, pdf_source, pdf_name
+
 try:
     from openai import OpenAI
     from pdf2image import convert_from_path
@@ -24,6 +28,7 @@ class GPT4VisionExtractor:
         self.extraction_time = 0
         self.model = model
         self.total_cost = 0
+        self.page_errors = {}
         
         if not OPENAI_AVAILABLE:
             raise ImportError("OpenAI not installed. Run: uv pip install openai pdf2image")
@@ -52,35 +57,18 @@ class GPT4VisionExtractor:
         
         return image_data
     
-    def extract_tables(self, pdf_path: str, pages: str = 'all') -> List[Dict[str, Any]]:
-        """
-        Extract tables from PDF using GPT-4 Vision
-        
-        Args:
-            pdf_path: Path to PDF file
-            pages: Pages to process ('all' or page numbers)
-            
-        Returns:
-            List of extracted tables with metadata
-        """
-        start_time = time.time()
-        tables = []
+    def _extract_page(self, pdf_path: str, page_num: int) -> List[Dict[str, Any]]:
+        """Send one page to GPT-4 Vision and parse its tables (charged even if parsing fails)"""
+        page_tables = []
         
+        # Convert to image
         if self.verbose:
-            print(f"Processing {Path(pdf_path).name} with GPT-4 Vision ({self.model})")
+            print(f"  Converting page {page_num} to image...")
         
-        try:
-            # For now, process first page only (can extend to multiple)
-            page_num = 1
-            
-            # Convert to image
-            if self.verbose:
-                print(f"  Converting page {page_num} to image...")
-            
-            image_b64 = self.pdf_to_image(pdf_path, page_num)
-            
-            # Prepare prompt
-            prompt = """Extract all tables from this image in JSON format.
+        image_b64 = self.pdf_to_image(pdf_path, page_num)
+        
+        # Prepare prompt
+        prompt = """Extract all tables from this image in JSON format.
 
 For each table, provide:
 1. The table data as a 2D array (rows and columns)
@@ -101,94 +89,152 @@ Return ONLY valid JSON in this format:
 
 Be precise with numbers and text. Preserve formatting."""
 
-            if self.verbose:
-                print(f"  Sending request to {self.model}...")
-            
-            # Call GPT-4 Vision API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{image_b64}"
-                                }
+        if self.verbose:
+            print(f"  Sending request to {self.model}...")
+        
+        # Call GPT-4 Vision API
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/png;base64,{image_b64}"
                             }
-                        ]
-                    }
-                ],
-                max_tokens=4096,
-                temperature=0
-            )
-            
-            # Parse response
-            content = response.choices[0].message.content
-            
-            # Extract JSON from response (might be wrapped in markdown)
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(content)
-            
-            # Convert to our format
-            for idx, table in enumerate(result.get('tables', [])):
-                table_data = table.get('data', [])
-                
-                table_info = {
-                    'page': page_num,
-                    'table_index': idx,
-                    'data': table_data,
-                    'num_rows': len(table_data),
-                    'num_cols': len(table_data[0]) if table_data else 0,
-                    'model': self.model
+                        }
+                    ]
                 }
-                tables.append(table_info)
-                
-                if self.verbose:
-                    print(f"  Table {idx}: {table_info['num_rows']}x{table_info['num_cols']}")
+            ],
+            max_tokens=4096,
+            temperature=0
+        )
+        
+        # Calculate cost (approximate)
+        # GPT-4o: ~$2.50 per 1M input tokens, ~$10 per 1M output tokens
+        input_tokens = response.usage.prompt_tokens
+        output_tokens = response.usage.completion_tokens
+        cost = (input_tokens * 2.5 / 1_000_000) + (output_tokens * 10 / 1_000_000)
+        self.total_cost += cost
+        
+        if self.verbose:
+            print(f"  Tokens: {input_tokens} input, {output_tokens} output")
+            print(f"  Cost: ${cost:.4f}")
+        
+        # Parse response
+        content = response.choices[0].message.content
+        
+        # Extract JSON from response (might be wrapped in markdown)
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+        
+        result = json.loads(content)
+        
+        # Convert to our format
+        for idx, table in enumerate(result.get('tables', [])):
+            table_data = table.get('data', [])
             
-            # Calculate cost (approximate)
-            # GPT-4o: ~$2.50 per 1M input tokens, ~$10 per 1M output tokens
-            input_tokens = response.usage.prompt_tokens
-            output_tokens = response.usage.completion_tokens
-            cost = (input_tokens * 2.5 / 1_000_000) + (output_tokens * 10 / 1_000_000)
-            self.total_cost += cost
+            table_info = {
+                'page': page_num,
+                'table_index': idx,
+                'data': table_data,
+                'num_rows': len(table_data),
+                'num_cols': len(table_data[0]) if table_data else 0,
+                'model': self.model
+            }
+            page_tables.append(table_info)
+            
+            if self.verbose:
+                print(f"  Table {idx}: {table_info['num_rows']}x{table_info['num_cols']}")
+        
+        return page_tables
+    
+    def iter_tables(self, pdf_path: PdfInput, pages: str = '1') -> Iterator[Dict[str, Any]]:
+        """
+        Yield tables page by page as each page's response is parsed
+        
+        A page whose request or response fails is reported, recorded in
+        page_errors and skipped; other errors propagate to the caller (use
+        extract_tables for the error-handling wrapper).
+        
+        Args:
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object
+            pages: Pages to process ('all' or page numbers; default page 1,
+                   since every page is a paid request)
             
+        Yields:
+            Table dictionaries, in page order
+        """
+        start_time = time.time()
+        self.page_errors = {}
+        
+        with pdf_source(pdf_path) as source:
             if self.verbose:
-                print(f"  Tokens: {input_tokens} input, {output_tokens} output")
-                print(f"  Cost: ${cost:.4f}")
+                print(f"Processing {Path(source.name).name} with GPT-4 Vision ({self.model})")
+            
+            for page_num in resolve_pages(source, pages):
+                try:
+                    page_tables = self._extract_page(source.path, page_num)
+                except Exception as e:
+                    # A bad response on one page must not discard the pages
+                    # already extracted and paid for
+                    print(f"  Error on page {page_num}: {e}")
+                    self.page_errors[page_num] = str(e)
+                    continue
+                yield from page_tables
         
+        self.extraction_time = time.time() - start_time
+    
+    def extract_tables(self, pdf_path: PdfInput, pages: str = '1') -> List[Dict[str, Any]]:
+        """
+        Extract tables from PDF using GPT-4 Vision
+        
+        Args:
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object
+            pages: Pages to process ('all' or page numbers; default page 1,
+                   since every page is a paid request)
+            
+        Returns:
+            List of extracted tables with metadata
+        """
+        try:
+            tables = list(self.iter_tables(pdf_path, pages=pages))
         except Exception as e:
-            print(f"Error processing {pdf_path}: {e}")
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
             if self.verbose:
                 import traceback
                 traceback.print_exc()
             return []
         
-        self.extraction_time = time.time() - start_time
-        
         if self.verbose:
             print(f"Extracted {len(tables)} tables in {self.extraction_time:.2f}s")
             print(f"Total cost: ${self.total_cost:.4f}\n")
         
         return tables
     
+    def _json_metadata(self) -> Dict[str, Any]:
+        """Run metadata written alongside the tables (tables_to_json, extract_to_file)"""
+        return {
+            'extraction_time': self.extraction_time,
+            'method': 'gpt4_vision',
+            'model': self.model,
+            'cost': self.total_cost
+        }
+    
     def tables_to_json(self, tables: List[Dict[str, Any]], 
                        include_metadata: bool = True) -> str:
         """Convert extracted tables to JSON format"""
         if include_metadata:
             output = {
                 'num_tables': len(tables),
-                'extraction_time': self.extraction_time,
-                'method': 'gpt4_vision',
-                'model': self.model,
-                'cost': self.total_cost,
+                **self._json_metadata(),
                 'tables': tables
             }
         else:
@@ -196,34 +242,36 @@ Be precise with numbers and text. Preserve formatting."""
         
         return json.dumps(output, indent=2)
     
-    def extract_to_file(self, pdf_path: str, output_path: str):
-        """Extract tables and save to JSON file"""
-        tables = self.extract_tables(pdf_path)
-        json_output = self.tables_to_json(tables)
-        
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w') as f:
-            f.write(json_output)
+    def extract_to_file(self, pdf_path: PdfInput, output_path: str, pages: str = '1'):
+        """Extract tables and save to JSON file (page 1 unless pages is given)"""
+        # Each table is written as soon as its page is done, the metadata
+        # once the iterator finishes
+        tables = self.iter_tables(pdf_path, pages=pages)
+        try:
+            num_tables = write_tables_json(output_path, tables, final_metadata=self._json_metadata)
+        except Exception as e:
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
+            return
         
         if self.verbose:
-            print(f"Saved to {output_file}")
+            print(f"Saved {num_tables} tables to {output_path}")
 
 def main():
     """Example usage"""
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python gpt4_vision_extractor.py <pdf_file> [output.json]")
+        print("Usage: python gpt4_vision_extractor.py <pdf_file> [output.json] [pages]")
+        print("\nPages default to 1; each page is one paid API request ('all' for every page)")
         print("\nRequires OPENAI_API_KEY environment variable")
         sys.exit(1)
     
     pdf_file = sys.argv[1]
     output_file = sys.argv[2] if len(sys.argv) > 2 else "output_gpt4v.json"
+    pages = sys.argv[3] if len(sys.argv) > 3 else '1'
     
     extractor = GPT4VisionExtractor(verbose=True)
-    extractor.extract_to_file(pdf_file, output_file)
+    extractor.extract_to_file(pdf_file, output_file, pages=pages)
 
 if __name__ == "__main__":
     main()
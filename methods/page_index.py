@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Table-page index: which pages of a document hold tables
+
+Extractors take a ``pages`` argument; this module builds it so that work
+scales with the number of table pages instead of document length. The
+index is filled from ground truth when benchmarking, or from a cheap
+text-layer detector in production.
+"""
+import json
+import re
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union, Iterable, Tuple
+
+from methods.pdf_source import PdfInput, pdf_handle
+
+Pages = Union[str, int, Iterable[int], None]
+
+NUMERIC_TOKEN = re.compile(r'^\(?[-$€£]?\(?\d[\d,.]*%?\)?$')
+
+
+def parse_pages(pages: Pages, num_pages: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Normalize a pages spec to a sorted list of 1-based page numbers
+
+    Args:
+        pages: 'all', '1,3-5', an int, or an iterable of ints
+        num_pages: Document page count, used to expand 'all' and clip ranges
+
+    Returns:
+        Sorted unique page numbers, or None for 'all' when num_pages is unknown
+    """
+    if pages is None or (isinstance(pages, str) and pages.strip().lower() == 'all'):
+        return list(range(1, num_pages + 1)) if num_pages else None
+
+    if isinstance(pages, int):
+        result = {pages}
+    elif isinstance(pages, str):
+        result = set()
+        for part in pages.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if '-' in part:
+                start, end = part.split('-', 1)
+                end = end.strip()
+                if end.lower() == 'end':
+                    if not num_pages:
+                        raise ValueError(f"Cannot expand '{part}' without a page count")
+                    end = num_pages
+                result.update(range(int(start), int(end) + 1))
+            else:
+                result.add(int(part))
+    else:
+        result = {int(p) for p in pages}
+
+    if num_pages:
+        result = {p for p in result if 1 <= p <= num_pages}
+
+    return sorted(result)
+
+
+def format_pages(pages: Pages) -> str:
+    """
+    Format pages as the compact string tabula/camelot expect ('1,3-5')
+
+    Args:
+        pages: Any spec accepted by parse_pages
+
+    Returns:
+        Page string, 'all' when no restriction applies
+    """
+    page_list = parse_pages(pages)
+    if page_list is None:
+        return 'all'
+    if not page_list:
+        return ''
+
+    ranges = []
+    start = prev = page_list[0]
+    for p in page_list[1:] + [None]:
+        if p is not None and p == prev + 1:
+            prev = p
+            continue
+        ranges.append(str(start) if start == prev else f"{start}-{prev}")
+        if p is not None:
+            start = prev = p
+
+    return ','.join(ranges)
+
+
+def split_pages(page_nums: List[int], num_chunks: int) -> List[List[int]]:
+    """Split pages into contiguous, near-equal ranges (for page-parallel workers)"""
+    size, extra = divmod(len(page_nums), num_chunks)
+    chunks = []
+    start = 0
+    for i in range(num_chunks):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            chunks.append(page_nums[start:end])
+        start = end
+    return chunks
+
+
+def page_runs(page_nums: List[int]) -> List[Tuple[int, int]]:
+    """Group sorted pages into consecutive (first, last) runs: [1, 2, 3, 7] -> [(1, 3), (7, 7)]"""
+    runs = []
+    for p in page_nums:
+        if runs and p == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], p)
+        else:
+            runs.append((p, p))
+    return runs
+
+
+def get_page_count(pdf_path: PdfInput) -> int:
+    """Return the number of pages in a PDF without parsing page content"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        from PyPDF2 import PdfReader
+
+    with pdf_handle(pdf_path) as handle:
+        return len(PdfReader(handle).pages)
+
+
+def resolve_pages(pdf_path: PdfInput, pages: Pages) -> List[int]:
+    """Expand a pages spec into the concrete page numbers of a document"""
+    page_list = parse_pages(pages)
+    if page_list is None:
+        return list(range(1, get_page_count(pdf_path) + 1))
+    return page_list
+
+
+def _count_aligned(xs: List[float], tolerance: float, min_count: int) -> int:
+    """Count clusters of x-coordinates (within tolerance) with min_count members"""
+    clusters = 0
+    run = 0
+    prev = None
+    for x in sorted(xs):
+        if prev is not None and x - prev <= tolerance:
+            run += 1
+        else:
+            if run >= min_count:
+                clusters += 1
+            run = 1
+        prev = x
+    if run >= min_count:
+        clusters += 1
+    return clusters
+
+
+def page_table_features(page, align_tolerance: float = 3.0,
+                        min_column_rows: int = 3) -> Dict[str, Any]:
+    """
+    Cheap table evidence for a pdfplumber page
+
+    Uses only objects pdfplumber has already parsed (no edge/cell
+    pipeline): ruling line/rect counts, numeric token density and the
+    number of x-aligned numeric columns. Financial figures are
+    right-aligned, so numeric columns are clustered on their right edge.
+
+    Args:
+        page: pdfplumber Page
+        align_tolerance: Max x distance (pt) between aligned tokens
+        min_column_rows: Tokens needed to count as a column
+    """
+    words = page.extract_words()
+    numeric_x1 = [w['x1'] for w in words if NUMERIC_TOKEN.match(w['text'])]
+
+    return {
+        'num_lines': len(page.lines),
+        'num_rects': len(page.rects),
+        'num_words': len(words),
+        'num_numeric': len(numeric_x1),
+        'numeric_ratio': len(numeric_x1) / len(words) if words else 0.0,
+        'num_numeric_columns': _count_aligned(numeric_x1, align_tolerance, min_column_rows),
+    }
+
+
+def is_table_page(features: Dict[str, Any], min_rules: int = 3,
+                  min_numeric_columns: int = 2, min_numeric: int = 8,
+                  min_numeric_ratio: float = 0.15) -> bool:
+    """
+    Classify a page from page_table_features
+
+    Deliberately permissive: a page is rejected only when it has no
+    ruling lines, no aligned numeric columns and no dense numeric
+    block. A missed page costs recall, an extra page only costs time.
+    """
+    if features['num_lines'] + features['num_rects'] >= min_rules:
+        return True
+    if features['num_numeric_columns'] >= min_numeric_columns:
+        return True
+    return (features['num_numeric'] >= min_numeric and
+            features['numeric_ratio'] >= min_numeric_ratio)
+
+
+def page_has_table(page, min_rules: int = 3, **kwargs) -> bool:
+    """
+    is_table_page for a pdfplumber page, short-circuiting on ruling lines
+
+    Lines and rects come for free with the page parse; words are only
+    extracted for pages without enough rules.
+    """
+    if len(page.lines) + len(page.rects) >= min_rules:
+        return True
+    return is_table_page(page_table_features(page), min_rules=min_rules, **kwargs)
+
+
+def detect_table_pages(pdf_path: PdfInput, **kwargs) -> List[int]:
+    """
+    Detect pages that likely contain tables
+
+    Args:
+        pdf_path: Path to PDF file, or in-memory PDF (see pdf_source)
+        **kwargs: Thresholds passed to is_table_page
+
+    Returns:
+        1-based page numbers
+    """
+    import pdfplumber
+
+    table_pages = []
+    with pdf_handle(pdf_path) as handle, pdfplumber.open(handle) as pdf:
+        for page_num, page in enumerate(pdf.pages, 1):
+            if page_has_table(page, **kwargs):
+                table_pages.append(page_num)
+            page.close()
+
+    return table_pages
+
+
+def ground_truth_pages(annotations: Any) -> List[int]:
+    """
+    Read table pages from FinTabNet.c-style annotations
+
+    Accepts a JSON string, a single table dict or a list of tables.
+    Tables carry either a 0-based 'pdf_page_index' or a 1-based
+    'page'/'page_num'.
+    """
+    if isinstance(annotations, (str, bytes)):
+        annotations = json.loads(annotations)
+    if isinstance(annotations, dict):
+        annotations = annotations.get('tables', [annotations])
+
+    pages = set()
+    for table in annotations or []:
+        if not isinstance(table, dict):
+            continue
+        if table.get('pdf_page_index') is not None:
+            pages.add(int(table['pdf_page_index']) + 1)
+        elif table.get('page') is not None:
+            pages.add(int(table['page']))
+        elif table.get('page_num') is not None:
+            pages.add(int(table['page_num']))
+
+    return sorted(pages)
+
+
+class TablePageIndex:
+    """Per-document index of pages that hold tables"""
+
+    def __init__(self, index: Dict[str, List[int]] = None):
+        self.index = {k: sorted(set(v)) for k, v in (index or {}).items()}
+
+    @staticmethod
+    def doc_key(doc: str) -> str:
+        """Documents are keyed by file name so paths may differ between runs"""
+        return Path(str(doc)).name
+
+    def add(self, doc: str, pages: Iterable[int]):
+        key = self.doc_key(doc)
+        self.index[key] = sorted(set(self.index.get(key, [])) | set(pages))
+
+    def __contains__(self, doc: str) -> bool:
+        return self.doc_key(doc) in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get(self, doc: str) -> Optional[List[int]]:
+        """Indexed pages for a document, or None if it is not indexed"""
+        return self.index.get(self.doc_key(doc))
+
+    def pages_for(self, doc: str, default: str = 'all') -> str:
+        """
+        The ``pages`` argument to pass to an extractor for this document
+
+        Returns ``default`` for documents that are not indexed, and an
+        empty string for documents indexed as having no tables.
+        """
+        pages = self.get(doc)
+        if pages is None:
+            return default
+        return format_pages(pages)
+
+    @classmethod
+    def from_ground_truth(cls, samples: Iterable[Dict[str, Any]],
+                          doc_field: str = None,
+                          annotation_field: str = 'json') -> 'TablePageIndex':
+        """
+        Build the index from benchmark ground truth
+
+        Args:
+            samples: Dataset samples
+            doc_field: Field identifying the document (default: first of
+                       pdf_path, pdf, __url__, __key__ that is present)
+            annotation_field: Field with the table annotations
+
+        Documents whose annotations give no page are left out of the index,
+        so they are processed in full rather than skipped as table-free.
+        """
+        index = cls()
+        unpaged = 0
+        for sample in samples:
+            doc = None
+            for field in [doc_field] if doc_field else ['pdf_path', 'pdf', '__url__', '__key__']:
+                value = sample.get(field)
+                # Undecoded file columns hold {'bytes', 'path'}; the path names the document
+                if isinstance(value, dict):
+                    value = value.get('path')
+                if isinstance(value, str):
+                    doc = value
+                    break
+            if doc is None:
+                continue
+            pages = ground_truth_pages(sample.get(annotation_field))
+            if not pages:
+                unpaged += 1
+                continue
+            index.add(doc, pages)
+
+        if unpaged:
+            print(f"  ⚠ {unpaged} documents have no table pages in their annotations; "
+                  f"processing all their pages")
+        return index
+
+    @classmethod
+    def from_detector(cls, pdf_paths: Iterable[str], **kwargs) -> 'TablePageIndex':
+        """Build the index with detect_table_pages (production path)"""
+        index = cls()
+        for pdf_path in pdf_paths:
+            index.add(pdf_path, detect_table_pages(pdf_path, **kwargs))
+        return index
+
+    def save(self, path: str):
+        """Save the index to a JSON file"""
+        output_file = Path(path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, 'w') as f:
+            json.dump(self.index, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'TablePageIndex':
+        """Load an index saved with save()"""
+        with open(path) as f:
+            return cls(json.load(f))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+PDF input from paths, in-memory buffers, file objects and memory maps
+
+Every extractor accepts a PdfInput: a path, bytes/bytearray/memoryview,
+an mmap, or a binary file object. PdfSource wraps one document so each
+backend can take the cheapest route to it:
+
+- handle(): for libraries that read a path or a seekable stream
+  (pdfplumber, pypdf); buffers are served through a zero-copy reader.
+- path: for libraries that only take a file name (pdf2image, tabula,
+  camelot). In-memory input is written to one temp file, created on
+  first use and shared by every method that runs on the same PdfSource.
+"""
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Union, BinaryIO, Iterator
+
+PdfInput = Union[str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap, BinaryIO]
+
+
+class _BufferReader(io.RawIOBase):
+    """Read-only, seekable file object over a memoryview (no copy of the data)"""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = offset
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+class PdfSource:
+    """One PDF document, from whichever input form the caller has"""
+
+    def __init__(self, pdf: PdfInput):
+        """
+        Args:
+            pdf: Path, bytes-like object, mmap, or binary file object.
+                 File objects backed by a real file are memory-mapped
+                 rather than read.
+        """
+        self._path = None
+        self._buffer = None
+        self._bytes = None
+        self._mmap = None
+        self._tmp_path = None
+        self._hash = None
+        # Every memoryview created here, released in close() so the
+        # caller's buffer can be resized or closed again
+        self._views = []
+        self.name = '<memory>'
+
+        if isinstance(pdf, (str, os.PathLike)):
+            self._path = os.fspath(pdf)
+            self.name = self._path
+        elif isinstance(pdf, bytes):
+            self._bytes = pdf
+            self._buffer = self._track(memoryview(pdf))
+        elif isinstance(pdf, (bytearray, memoryview, mmap.mmap)):
+            self._buffer = self._track(self._track(memoryview(pdf)).cast('B'))
+        elif hasattr(pdf, 'read'):
+            self._buffer = self._file_buffer(pdf)
+            name = getattr(pdf, 'name', None)
+            if isinstance(name, str):
+                self.name = name
+                # A file object on disk can be handed to path-only backends as is
+                if os.path.isfile(name):
+                    self._path = name
+        else:
+            raise TypeError(f"Unsupported PDF input: {type(pdf).__name__}")
+
+    def _track(self, view: memoryview) -> memoryview:
+        """Register a memoryview for release in close()"""
+        self._views.append(view)
+        return view
+
+    def _file_buffer(self, f: BinaryIO) -> memoryview:
+        """Zero-copy view of a file object where possible, else its contents"""
+        if isinstance(f, io.BytesIO):
+            return self._track(f.getbuffer())
+        try:
+            fileno = f.fileno()
+            self._mmap = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            return self._track(memoryview(self._mmap))
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            # Sockets, pipes, in-memory streams without a buffer
+            pass
+        if hasattr(f, 'seek'):
+            f.seek(0)
+        self._bytes = f.read()
+        return self._track(memoryview(self._bytes))
+
+    @property
+    def is_path(self) -> bool:
+        """True when the document already lives in a file on disk"""
+        return self._path is not None
+
+    @property
+    def path(self) -> str:
+        """
+        File name of the document, for path-only backends
+
+        In-memory input is written to a temp file once; later calls (from
+        any method sharing this source) reuse it until close().
+        """
+        if self._path is None:
+            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+                tmp.write(self._buffer)
+            self._path = self._tmp_path = tmp.name
+        return self._path
+
+    def handle(self) -> Union[str, BinaryIO]:
+        """
+        Argument for libraries that accept a path or a binary stream
+
+        Returns the path for on-disk documents (the library opens and
+        closes the file itself), otherwise a fresh zero-copy reader.
+        """
+        if self._buffer is None:
+            return self._path
+        if self._bytes is not None:
+            # BytesIO shares an immutable bytes object until written to
+            return io.BytesIO(self._bytes)
+        return io.BufferedReader(_BufferReader(self._track(memoryview(self._buffer))))
+
+    def getvalue(self) -> bytes:
+        """Document contents as bytes (copies only for mutable buffers)"""
+        if self._bytes is None:
+            if self._buffer is None:
+                with open(self._path, 'rb') as f:
+                    self._bytes = f.read()
+            else:
+                self._bytes = self._buffer.tobytes()
+        return self._bytes
+
+    def sha256(self) -> str:
+        """SHA-256 of the document contents"""
+        if self._hash is None:
+            if self._buffer is None:
+                from methods.traditional.layout_cache import file_hash
+                self._hash = file_hash(self._path)
+            else:
+                self._hash = hashlib.sha256(self._buffer).hexdigest()
+        return self._hash
+
+    def close(self):
+        """Delete the temp file (if one was written) and release views and maps"""
+        if self._tmp_path is not None:
+            try:
+                os.unlink(self._tmp_path)
+            except FileNotFoundError:
+                pass
+            self._path = self._tmp_path = None
+        # Derived views first; readers handed out by handle() stop working
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._buffer = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> 'PdfSource':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextmanager
+def pdf_source(pdf: PdfInput) -> Iterator[PdfSource]:
+    """
+    Wrap a PdfInput for the duration of one extraction
+
+    An existing PdfSource is passed through and left open, so a caller
+    can share one source (and its temp file) across several extractors.
+    """
+    if isinstance(pdf, PdfSource):
+        yield pdf
+        return
+
+    source = PdfSource(pdf)
+    try:
+        yield source
+    finally:
+        source.close()
+
+
+def pdf_name(pdf: PdfInput) -> str:
+    """Display name of a PdfInput for logs and error messages"""
+    if isinstance(pdf, PdfSource):
+        return pdf.name
+    if isinstance(pdf, (str, os.PathLike)):
+        return os.fspath(pdf)
+    name = getattr(pdf, 'name', None)
+    return name if isinstance(name, str) else '<memory>'
+
+
+@contextmanager
+def pdf_handle(pdf: Union[PdfInput, PdfSource]) -> Iterator[Union[str, BinaryIO]]:
+    """
+    Path or stream for pdfplumber/pypdf, valid until the block exits
+
+    A PdfSource created here for raw input (and any map it holds) is
+    closed on exit; a PdfSource passed in is left open, as in pdf_source.
+    """
+    with pdf_source(pdf) as source:
+        yield source.handle()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Lightweight resource measurement shared by the extractors
+"""
+import os
+import sys
+
+
+def current_rss_mb() -> float:
+    """
+    Resident set size of this process in MB
+
+    Uses psutil when installed, /proc on Linux, and falls back to the
+    process high-water mark from getrusage elsewhere.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process over its lifetime, in MB"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def private_rss_mb() -> float:
+    """
+    Memory resident in this process alone (USS), in MB
+
+    Unlike RSS, excludes pages shared with other processes, such as model
+    weights a forked worker inherits copy-on-write from its parent. Falls
+    back to RSS where it cannot be measured.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_full_info().uss / (1024 * 1024)
+    except (ImportError, AttributeError, OSError):
+        pass
+
+    try:
+        private_kb = 0
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                    private_kb += int(line.split()[1])
+        return private_kb / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return current_rss_mb()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Table regions: which parts of which pages hold tables
+
+A region is a bbox (x0, top, x1, bottom) in PDF points with the origin
+at the top-left of the page, the convention of pdfplumber, tabula's
+area option and FinTabNet.c's pdf_bbox. Regions map 1-based page
+numbers to lists of bboxes. Detectors (Table Transformer, Docling, ground
+truth) produce them; the traditional extractors take them to parse only
+those areas. Camelot measures y from the bottom of the page, so its
+areas are flipped using the page height.
+"""
+import json
+from typing import List, Dict, Any, Tuple, Iterable, Optional, Union
+
+from methods.pdf_source import PdfInput, pdf_handle
+
+BBox = Tuple[float, float, float, float]
+Regions = Dict[int, List[BBox]]
+
+
+def normalize_bbox(bbox: Iterable[float]) -> BBox:
+    """Return a bbox as floats with x0 <= x1 and top <= bottom"""
+    x0, top, x1, bottom = (float(v) for v in bbox)
+    return (min(x0, x1), min(top, bottom), max(x0, x1), max(top, bottom))
+
+
+def normalize_regions(regions: Union[Dict[Any, Iterable[Iterable[float]]], str, None]
+                      ) -> Optional[Regions]:
+    """
+    Normalize a regions mapping (or its JSON) for the extractors
+
+    Page keys become ints (JSON object keys are strings) and bboxes become
+    ordered float tuples. Pages with no bboxes are dropped.
+    """
+    if regions is None:
+        return None
+    if isinstance(regions, str):
+        regions = json.loads(regions)
+
+    normalized = {}
+    for page, bboxes in regions.items():
+        bboxes = [normalize_bbox(bbox) for bbox in bboxes]
+        if bboxes:
+            normalized[int(page)] = bboxes
+    return normalized
+
+
+def pixels_to_points(bbox: Iterable[float], dpi: float) -> BBox:
+    """Convert a bbox on a page image rendered at dpi to PDF points"""
+    scale = 72.0 / dpi
+    return normalize_bbox(v * scale for v in bbox)
+
+
+def from_cropbox(bbox: BBox, origin: Tuple[float, float]) -> BBox:
+    """
+    Convert a bbox measured from a page's CropBox corner to region points
+
+    Renderers (pdftoppm with use_cropbox, pypdfium2) draw the CropBox;
+    origin is its top-left corner in region points, pdfplumber's
+    page.cropbox[:2].
+    """
+    dx, dy = origin
+    x0, top, x1, bottom = bbox
+    return (x0 + dx, top + dy, x1 + dx, bottom + dy)
+
+
+def regions_from_tables(tables: Iterable[Dict[str, Any]]) -> Regions:
+    """Collect regions from extracted table dicts that carry a 'bbox'"""
+    regions = {}
+    for table in tables:
+        if table.get('bbox') is not None and table.get('page', -1) > 0:
+            regions.setdefault(table['page'], []).append(normalize_bbox(table['bbox']))
+    return regions
+
+
+def tabula_area(bbox: BBox) -> List[float]:
+    """tabula area ([top, left, bottom, right]) for a region"""
+    x0, top, x1, bottom = bbox
+    return [top, x0, bottom, x1]
+
+
+def camelot_area(bbox: BBox, page_height: float) -> str:
+    """Camelot table_areas/table_regions entry ('x1,y1,x2,y2', y up) for a region"""
+    x0, top, x1, bottom = bbox
+    return f"{x0},{page_height - top},{x1},{page_height - bottom}"
+
+
+def plumber_bbox(bbox: BBox, page) -> Optional[BBox]:
+    """A region clipped to a pdfplumber page's bbox (None if they don't overlap)"""
+    px0, ptop, px1, pbottom = page.bbox
+    x0, top, x1, bottom = bbox
+    clipped = (max(x0, px0), max(top, ptop), min(x1, px1), min(bottom, pbottom))
+    if clipped[0] >= clipped[2] or clipped[1] >= clipped[3]:
+        return None
+    return clipped
+
+
+def page_heights(pdf_path: PdfInput, page_nums: Iterable[int]) -> Dict[int, float]:
+    """Page heights in points (from the page boxes, no content parsing)"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        from PyPDF2 import PdfReader
+
+    heights = {}
+    with pdf_handle(pdf_path) as handle:
+        reader = PdfReader(handle)
+        for page_num in page_nums:
+            page = reader.pages[page_num - 1]
+            box = page.mediabox
+            # Viewers (and Camelot) measure rotated pages in their displayed orientation
+            rotated = (page.get('/Rotate') or 0) % 180 == 90
+            heights[page_num] = float(box.width if rotated else box.height)
+    return heights
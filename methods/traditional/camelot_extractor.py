@@ -3,10 +3,20 @@
 PDF Table Extraction using Camelot
 """
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any
+from types import SimpleNamespace
+from typing import List, Dict, Any, Iterator, Tuple
 import time
 
+from methods.json_writer import write_tables_json
+from methods.page_index import format_pages, resolve_pages, split_pages
+from methods.pdf_source import PdfInput, pdf_source, pdf_name
+from methods.regions import Regions, normalize_regions, camelot_area, page_heights
+from methods.traditional.table_profiles import page_flavors
+
 try:
     import camelot
     CAMELOT_AVAILABLE = True
@@ -14,77 +24,201 @@ except ImportError:
     CAMELOT_AVAILABLE = False
     print("Warning: Camelot not available. Install with: uv pip install 'camelot-py[base]'")
 
+# How regions are handed to Camelot: as exact table boundaries, or as
+# areas Camelot searches for tables
+REGION_MODES = {'areas': 'table_areas', 'regions': 'table_regions'}
+
+
+def _passes_gates(table, gates: Dict[str, float]) -> bool:
+    """
+    Check a camelot Table against the quality gates
+    
+    Reads only Camelot's parsing report and the table shape, so a
+    rejected table's cells are never converted.
+    """
+    report = table.parsing_report
+    num_rows, num_cols = table.shape
+    return (report['accuracy'] >= gates['min_accuracy'] and
+            report['whitespace'] <= gates['max_whitespace'] and
+            num_rows >= gates['min_rows'] and
+            num_cols >= gates['min_cols'])
+
+
+# Thread counts OpenMP and BLAS read when they are loaded
+THREAD_ENV = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+
+@contextmanager
+def _single_thread_env():
+    """
+    Set THREAD_ENV to 1 while worker processes are started
+    
+    The variables only take effect in workers that load the libraries
+    themselves (spawn/forkserver); forked workers inherit libraries the
+    parent already loaded, which _init_worker limits at runtime.
+    """
+    saved = {name: os.environ.get(name) for name in THREAD_ENV}
+    os.environ.update({name: '1' for name in THREAD_ENV})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _available_cpus() -> int:
+    """CPUs this process may run on (its affinity mask, where the OS has one)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _init_worker():
+    """
+    Keep each worker to one core
+    
+    Every worker runs its own Ghostscript and OpenCV; left alone, OpenCV
+    (and any BLAS under numpy) starts a thread per core in each of them.
+    """
+    try:
+        import cv2
+        cv2.setNumThreads(1)
+    except ImportError:
+        pass
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=1)
+    except ImportError:
+        pass
+
+
+def _read_range(pdf_path: str, page_nums: List[int], flavor: str,
+                gates: Dict[str, float]) -> Tuple[List[SimpleNamespace], int]:
+    """
+    Parse a page range with Camelot in a worker process
+    
+    Tables failing the quality gates are dropped here, before they are
+    converted or sent back. The rest are returned as the fields
+    _table_info reads, rather than camelot Tables (which carry their
+    DataFrame, cells and text objects back through pickling).
+    
+    Returns:
+        (records, number of tables dropped by the gates)
+    """
+    table_list = camelot.read_pdf(pdf_path, pages=format_pages(page_nums), flavor=flavor)
+    records = [SimpleNamespace(page=table.page, data=table.data,
+                               accuracy=table.accuracy, whitespace=table.whitespace)
+               for table in table_list if _passes_gates(table, gates)]
+    return records, len(table_list) - len(records)
+
+
 class CamelotExtractor:
     """Extract tables from PDF using Camelot"""
     
-    def __init__(self, verbose: bool = True):
+    def __init__(self, verbose: bool = True, workers: int = 1,
+                 min_pages_per_worker: int = 4, min_accuracy: float = 0.0,
+                 max_whitespace: float = 100.0, min_rows: int = 1, min_cols: int = 1):
+        """
+        Args:
+            verbose: Print progress
+            workers: Worker processes for page-parallel extraction
+                     (1 = serial, 0 = one per CPU this process may run
+                     on). Each runs at most one
+                     Ghostscript/OpenCV job at a time, on one thread.
+            min_pages_per_worker: Below this many pages per worker,
+                                  fewer workers are used
+            min_accuracy: Drop tables below this parsing accuracy (0-100)
+            max_whitespace: Drop tables with more empty cells than this (%)
+            min_rows: Drop tables with fewer rows
+            min_cols: Drop tables with fewer columns
+        """
         self.verbose = verbose
         self.extraction_time = 0
+        self.page_flavors = {}
+        self.gates = {
+            'min_accuracy': min_accuracy,
+            'max_whitespace': max_whitespace,
+            'min_rows': min_rows,
+            'min_cols': min_cols,
+        }
+        self.dropped_tables = 0
+        cpus = _available_cpus()
+        # More workers than cores only oversubscribes the rasterizer
+        self.workers = min(workers, cpus) if workers > 0 else cpus
+        self.min_pages_per_worker = max(1, min_pages_per_worker)
         
         if not CAMELOT_AVAILABLE:
             raise ImportError("Camelot is not installed")
     
-    def extract_tables(self, pdf_path: str, 
+    def extract_tables(self, pdf_path: PdfInput, 
                       flavor: str = 'lattice',
-                      pages: str = 'all') -> List[Dict[str, Any]]:
+                      pages: str = 'all',
+                      regions: Regions = None,
+                      region_mode: str = 'areas') -> List[Dict[str, Any]]:
         """
         Extract all tables from a PDF file
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object (Camelot reads from a path, so
+                      in-memory input goes through one shared temp file)
             flavor: 'lattice' for bordered tables, 'stream' for borderless
             pages: Pages to process ('all' or '1,2,3' or '1-3')
+            regions: Table areas per page, (x0, top, x1, bottom) in PDF
+                     points from the top-left (see methods.regions). Only
+                     pages with regions are processed.
+            region_mode: 'areas' (each region is one table, Camelot's
+                         table_areas) or 'regions' (tables are searched
+                         for inside each region, Camelot's table_regions)
             
         Returns:
             List of extracted tables with metadata
         """
         start_time = time.time()
         tables = []
+        self.dropped_tables = 0
         
-        try:
-            if self.verbose:
-                print(f"Processing {Path(pdf_path).name} (Camelot {flavor} method)")
-            
-            # Extract tables
-            table_list = camelot.read_pdf(
-                pdf_path,
-                pages=pages,
-                flavor=flavor
-            )
+        pages = format_pages(pages)
+        if not pages:
+            # Page index says this document has no tables
+            self.extraction_time = 0
+            return []
+        
+        if regions is not None:
+            # Areas differ per page, so each page is its own Camelot pass
+            try:
+                tables = list(self.iter_tables(pdf_path, flavor=flavor, pages=pages,
+                                               regions=regions, region_mode=region_mode))
+            except Exception as e:
+                print(f"Error processing {pdf_name(pdf_path)}: {e}")
+                return []
             
             if self.verbose:
-                print(f"  Found {len(table_list)} tables")
+                print(f"Extracted {len(tables)} tables in {self.extraction_time:.2f}s\n")
             
-            # Convert to our format
-            for idx, table in enumerate(table_list):
-                # Get table data as list of lists
-                table_data = table.df.values.tolist()
-                
-                # Add headers (check if first column name is unnamed)
-                col_names = table.df.columns.tolist()
-                first_col = str(col_names[0]) if col_names else ''
-                if not first_col.startswith('Unnamed'):
-                    table_data = [col_names] + table_data
+            return tables
+        
+        try:
+            with pdf_source(pdf_path) as source:
+                if self.verbose:
+                    print(f"Processing {Path(source.name).name} (Camelot {flavor} method)")
                 
-                table_info = {
-                    'page': table.page,
-                    'table_index': idx,
-                    'data': table_data,
-                    'num_rows': len(table_data),
-                    'num_cols': len(table_data[0]) if table_data else 0,
-                    'accuracy': table.accuracy,
-                    'whitespace': table.whitespace,
-                    'flavor': flavor
-                }
-                tables.append(table_info)
+                # Extract tables
+                table_list = self._read_flavors(source, {flavor: resolve_pages(source, pages)})
                 
                 if self.verbose:
-                    print(f"  Table {idx} (Page {table.page}): "
-                          f"{table_info['num_rows']}x{table_info['num_cols']}, "
-                          f"accuracy={table.accuracy:.2f}")
+                    print(f"  Found {len(table_list) + self.dropped_tables} tables, "
+                          f"{self.dropped_tables} dropped by quality gates")
+                
+                # Convert to our format
+                for idx, (table, _) in enumerate(table_list):
+                    tables.append(self._table_info(table, idx, flavor))
         
         except Exception as e:
-            print(f"Error processing {pdf_path}: {e}")
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
             return []
         
         self.extraction_time = time.time() - start_time
@@ -94,28 +228,225 @@ class CamelotExtractor:
         
         return tables
     
-    def extract_auto(self, pdf_path: str, pages: str = 'all') -> List[Dict[str, Any]]:
+    def _table_info(self, table, idx: int, flavor: str) -> Dict[str, Any]:
+        """
+        Convert a camelot Table to our table dict
+        
+        Rows are read from the parsed cells' text (table.data) in one pass
+        rather than copied out of table.df through an object array. The
+        first row is kept as data, as Camelot found it (like Tabula, no
+        header row is inferred). Camelot reports the page as a string; it
+        is converted here for both the serial and the parallel path.
+        """
+        table_data = table.data
+        
+        table_info = {
+            'page': int(table.page),
+            'table_index': idx,
+            'data': table_data,
+            'num_rows': len(table_data),
+            'num_cols': len(table_data[0]) if table_data else 0,
+            'accuracy': table.accuracy,
+            'whitespace': table.whitespace,
+            'flavor': flavor
+        }
+        
+        if self.verbose:
+            print(f"  Table {idx} (Page {table.page}, {flavor}): "
+                  f"{table_info['num_rows']}x{table_info['num_cols']}, "
+                  f"accuracy={table.accuracy:.2f}, whitespace={table.whitespace:.2f}")
+        
+        return table_info
+    
+    def iter_tables(self, pdf_path: PdfInput, flavor: str = 'lattice',
+                    pages: str = 'all', regions: Regions = None,
+                    region_mode: str = 'areas') -> Iterator[Dict[str, Any]]:
+        """
+        Yield tables page by page as each page is parsed
+        
+        Runs camelot once per page, so the first tables are available
+        before the rest of the document is processed. Errors propagate
+        to the caller; use extract_tables for the error-handling wrapper.
+        
+        Args:
+            pdf_path: Path to PDF file, or in-memory PDF (see extract_tables)
+            flavor: 'lattice' for bordered tables, 'stream' for borderless,
+                    'auto' to choose per page from its ruling lines
+            pages: Pages to process ('all' or '1,2,3' or '1-3')
+            regions: Table areas per page (see extract_tables)
+            region_mode: 'areas' or 'regions' (see extract_tables)
+            
+        Yields:
+            Table dictionaries, in page order
+        """
+        if region_mode not in REGION_MODES:
+            raise ValueError(f"Unknown region mode: {region_mode} "
+                             f"(expected one of {tuple(REGION_MODES)})")
+        
+        start_time = time.time()
+        table_index = 0
+        self.page_flavors = {}
+        self.dropped_tables = 0
+        
+        with pdf_source(pdf_path) as source:
+            if self.verbose:
+                print(f"Processing {Path(source.name).name} (Camelot {flavor} method, streaming)")
+            
+            page_nums = resolve_pages(source, pages)
+            regions = normalize_regions(regions)
+            if regions is not None:
+                page_nums = [p for p in page_nums if p in regions]
+                # Camelot measures y up from the bottom of the page
+                heights = page_heights(source, page_nums)
+            
+            if flavor == 'auto':
+                # Ruling operators are scanned alongside extraction, one page at a time
+                flavors = page_flavors(source, page_nums)
+            else:
+                flavors = ((page_num, flavor) for page_num in page_nums)
+            
+            for page_num, page_flavor in flavors:
+                self.page_flavors[page_num] = page_flavor
+                area = {}
+                if regions is not None:
+                    area = {REGION_MODES[region_mode]: [camelot_area(bbox, heights[page_num])
+                                                        for bbox in regions[page_num]]}
+                
+                table_list = camelot.read_pdf(source.path, pages=str(page_num),
+                                              flavor=page_flavor, **area)
+                for table in self._apply_gates(table_list):
+                    yield self._table_info(table, table_index, page_flavor)
+                    table_index += 1
+        
+        self.extraction_time = time.time() - start_time
+    
+    def extract_auto(self, pdf_path: PdfInput, pages: str = 'all',
+                     regions: Regions = None, min_rules: int = 3) -> List[Dict[str, Any]]:
         """
-        Auto-detect best method (tries both lattice and stream)
+        Extract with lattice or stream chosen per page
+        
+        Pages with ruling lines in both directions go to lattice, the rest
+        to stream. The rules are counted from the path operators in the
+        page content streams (see table_profiles.page_flavors), without a
+        text parse, so Camelot's own pass is the only full parse. Each
+        flavor then runs once over only its own pages, so no page is
+        parsed twice and mixed documents keep both their ruled and unruled
+        tables. The choice per page is left in self.page_flavors; each
+        table carries its flavor, accuracy and whitespace.
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or in-memory PDF (see extract_tables)
             pages: Pages to process
+            regions: Table areas per page (see extract_tables)
+            min_rules: Horizontal and vertical rules a page needs for lattice
             
         Returns:
-            List of extracted tables
+            List of extracted tables, in page order
+        """
+        start_time = time.time()
+        self.page_flavors = {}
+        self.dropped_tables = 0
+        tables = []
+        
+        try:
+            # The ruling check and both flavors share one source (and temp
+            # file for in-memory input)
+            with pdf_source(pdf_path) as source:
+                if regions is not None:
+                    # Areas differ per page, so each page is its own Camelot pass
+                    tables = list(self.iter_tables(source, flavor='auto', pages=pages,
+                                                   regions=regions))
+                else:
+                    tables = self._extract_by_flavor(source, pages, min_rules)
+        
+        except Exception as e:
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
+            return []
+        
+        self.extraction_time = time.time() - start_time
+        
+        if self.verbose:
+            num_lattice = sum(1 for f in self.page_flavors.values() if f == 'lattice')
+            print(f"  Pages: {num_lattice} lattice, "
+                  f"{len(self.page_flavors) - num_lattice} stream")
+            print(f"  Quality gates dropped {self.dropped_tables} tables")
+            print(f"Extracted {len(tables)} tables in {self.extraction_time:.2f}s\n")
+        
+        return tables
+    
+    def _extract_by_flavor(self, source, pages: str, min_rules: int) -> List[Dict[str, Any]]:
+        """One Camelot pass per flavor over its pages, merged back into page order"""
+        if self.verbose:
+            print(f"Processing {Path(source.name).name} (Camelot auto method)")
+        
+        # A content-stream scan, not a parse: Camelot parses each page once below
+        self.page_flavors = dict(page_flavors(source, resolve_pages(source, pages), min_rules))
+        
+        found = self._read_flavors(source, {
+            flavor: [p for p, f in self.page_flavors.items() if f == flavor]
+            for flavor in ('lattice', 'stream')
+        })
+        return [self._table_info(table, idx, flavor) for idx, (table, flavor) in enumerate(found)]
+    
+    def _read_flavors(self, source, flavor_pages: Dict[str, List[int]]) -> List[Tuple[Any, str]]:
+        """
+        Parse each flavor's pages, serially or across worker processes
+        
+        In parallel mode the pages are cut into contiguous ranges (a few
+        per worker, so pages of uneven cost still balance) and all ranges
+        of all flavors share one pool. Workers open the document by path,
+        so in-memory input is written to the source's temp file once.
+        
+        Returns:
+            (table, flavor) pairs in page order, with Camelot's order kept
+            within a page and table.page as Camelot reported it
         """
-        # Try lattice first
-        tables_lattice = self.extract_tables(pdf_path, flavor='lattice', pages=pages)
+        jobs = [(flavor, page_nums) for flavor, page_nums in flavor_pages.items() if page_nums]
+        total_pages = sum(len(page_nums) for _, page_nums in jobs)
+        num_workers = min(self.workers, total_pages // self.min_pages_per_worker)
         
-        # Try stream if lattice found nothing
-        if not tables_lattice:
+        found = []
+        if num_workers <= 1:
+            for flavor, page_nums in jobs:
+                table_list = camelot.read_pdf(source.path, pages=format_pages(page_nums),
+                                              flavor=flavor)
+                found.extend((table, flavor) for table in self._apply_gates(table_list))
+        else:
+            ranges = [(flavor, chunk) for flavor, page_nums in jobs
+                      for chunk in split_pages(page_nums, max(1, num_workers * 4 * len(page_nums)
+                                                                 // total_pages))]
+            
             if self.verbose:
-                print("Lattice found nothing, trying stream method...")
-            tables_stream = self.extract_tables(pdf_path, flavor='stream', pages=pages)
-            return tables_stream
+                print(f"  Parallel: {total_pages} pages, {num_workers} workers, "
+                      f"{len(ranges)} ranges")
+            
+            with _single_thread_env(), \
+                    ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker) as pool:
+                results = pool.map(_read_range, [source.path] * len(ranges),
+                                   [chunk for _, chunk in ranges],
+                                   [flavor for flavor, _ in ranges],
+                                   [self.gates] * len(ranges))
+                for (flavor, _), (records, dropped) in zip(ranges, results):
+                    found.extend((record, flavor) for record in records)
+                    self.dropped_tables += dropped
         
-        return tables_lattice
+        # Stable sort: Camelot's order within a page is kept
+        found.sort(key=lambda item: int(item[0].page))
+        return found
+    
+    def _apply_gates(self, table_list) -> List[Any]:
+        """Tables passing the quality gates; the rest are counted in dropped_tables"""
+        kept = [table for table in table_list if _passes_gates(table, self.gates)]
+        self.dropped_tables += len(table_list) - len(kept)
+        return kept
+    
+    def _json_metadata(self) -> Dict[str, Any]:
+        """Run metadata written alongside the tables (tables_to_json, extract_to_file)"""
+        return {
+            'extraction_time': self.extraction_time,
+            'method': 'camelot',
+            'tables_dropped': self.dropped_tables
+        }
     
     def tables_to_json(self, tables: List[Dict[str, Any]], 
                        include_metadata: bool = True) -> str:
@@ -132,8 +463,7 @@ class CamelotExtractor:
         if include_metadata:
             output = {
                 'num_tables': len(tables),
-                'extraction_time': self.extraction_time,
-                'method': 'camelot',
+                **self._json_metadata(),
                 'tables': tables
             }
         else:
@@ -141,8 +471,8 @@ class CamelotExtractor:
         
         return json.dumps(output, indent=2, default=str)
     
-    def extract_to_file(self, pdf_path: str, output_path: str, 
-                       flavor: str = 'auto'):
+    def extract_to_file(self, pdf_path: PdfInput, output_path: str, 
+                       flavor: str = 'auto', pages: str = 'all'):
         """
         Extract tables and save to JSON file
         
@@ -150,22 +480,19 @@ class CamelotExtractor:
             pdf_path: Input PDF path
             output_path: Output JSON path
             flavor: 'lattice', 'stream', or 'auto'
+            pages: Pages to process
         """
-        if flavor == 'auto':
-            tables = self.extract_auto(pdf_path)
-        else:
-            tables = self.extract_tables(pdf_path, flavor=flavor)
-        
-        json_output = self.tables_to_json(tables)
-        
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w') as f:
-            f.write(json_output)
+        # Each table is written as soon as its page is done, the metadata
+        # once the iterator finishes
+        tables = self.iter_tables(pdf_path, flavor=flavor, pages=pages)
+        try:
+            num_tables = write_tables_json(output_path, tables, final_metadata=self._json_metadata)
+        except Exception as e:
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
+            return
         
         if self.verbose:
-            print(f"Saved to {output_file}")
+            print(f"Saved {num_tables} tables to {output_path}")
 
 def main():
     """Example usage"""
@@ -177,15 +504,17 @@ def main():
         sys.exit(1)
     
     if len(sys.argv) < 2:
-        print("Usage: python camelot_extractor.py <pdf_file> [output.json] [flavor]")
+        print("Usage: python camelot_extractor.py <pdf_file> [output.json] [flavor] [workers]")
         print("  flavor: lattice, stream, or auto (default: auto)")
+        print("  workers: worker processes for page-parallel mode (0 = all CPUs, default: 1)")
         sys.exit(1)
     
     pdf_file = sys.argv[1]
     output_file = sys.argv[2] if len(sys.argv) > 2 else "output_camelot.json"
     flavor = sys.argv[3] if len(sys.argv) > 3 else "auto"
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else 1
     
-    extractor = CamelotExtractor(verbose=True)
+    extractor = CamelotExtractor(verbose=True, workers=workers)
     extractor.extract_to_file(pdf_file, output_file, flavor=flavor)
 
 if __name__ == "__main__":
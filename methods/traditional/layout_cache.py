@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of pdfplumber's parsed page objects
+
+Parsing a page through pdfminer is most of pdfplumber's cost. This cache
+stores each page's parsed objects (chars, lines, rects, curves, ...) on
+disk, keyed by file hash, page number and parser version, so repeat runs
+and table_settings sweeps can rebuild pages without re-parsing.
+
+Objects are stored column-wise: per object kind and key set, every
+attribute becomes one column, with float/int columns packed as binary
+arrays and the rest written as JSON. Nothing is unpickled, so a shared
+cache directory cannot inject code. Entries are evicted
+least-recently-used once the cache exceeds its size budget; the running
+total lives in a small size file, so writes never rescan the cache.
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import pdfminer
+import pdfplumber
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process locking (Windows): size updates may race
+    fcntl = None
+
+CACHE_FORMAT = 2
+
+# Running total of cached bytes, and the lock serializing its updates
+SIZE_FILE = 'size'
+LOCK_FILE = 'size.lock'
+
+# Anything that changes parsed objects must change this string
+PARSER_VERSION = (f"pdfplumber-{pdfplumber.__version__}"
+                  f"_pdfminer-{pdfminer.__version__}"
+                  f"_cache-{CACHE_FORMAT}")
+
+
+def file_hash(pdf_path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _to_json(value: Any) -> Any:
+    """JSON-safe form of an object attribute; tuples are tagged to come back as tuples"""
+    if isinstance(value, tuple):
+        return {'t': [_to_json(v) for v in value]}
+    if isinstance(value, list):
+        return [_to_json(v) for v in value]
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    # PDF names and other parser types: kept as their text
+    return str(value)
+
+
+def _from_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(_from_json(v) for v in value['t'])
+    if isinstance(value, list):
+        return [_from_json(v) for v in value]
+    return value
+
+
+def _pack_column(values: List[Any], arrays: List[array]) -> list:
+    """
+    Column spec for the header: a binary array (appended to arrays)
+    when every value is a plain float/int, else the JSON values
+    """
+    for typecode, kind in (('d', float), ('q', int)):
+        if all(type(v) is kind for v in values):
+            arrays.append(array(typecode, values))
+            return [typecode, len(values)]
+    return ['j', [_to_json(v) for v in values]]
+
+
+def encode_objects(objects: Dict[str, List[Dict[str, Any]]]) -> bytes:
+    """
+    Encode pdfplumber page.objects into compact columnar bytes
+    
+    Layout (zlib-compressed): header length (8 bytes), JSON header of
+    [kind, keys, column specs] groups, then the little-endian binary
+    arrays in header order.
+    """
+    groups = []
+    arrays = []
+    for kind, objs in objects.items():
+        by_keys = {}
+        for obj in objs:
+            by_keys.setdefault(tuple(obj.keys()), []).append(obj)
+        for keys, rows in by_keys.items():
+            columns = [_pack_column([row[k] for row in rows], arrays) for k in keys]
+            groups.append([kind, list(keys), columns])
+
+    header = json.dumps(groups, separators=(',', ':')).encode()
+    body = []
+    for column in arrays:
+        if sys.byteorder != 'little':
+            column.byteswap()
+        body.append(column.tobytes())
+    return zlib.compress(struct.pack('<Q', len(header)) + header + b''.join(body), 1)
+
+
+def decode_objects(data: bytes) -> Dict[str, List[Dict[str, Any]]]:
+    """Rebuild page.objects from encode_objects output"""
+    data = zlib.decompress(data)
+    (header_len,) = struct.unpack_from('<Q', data)
+    offset = 8 + header_len
+    groups = json.loads(data[8:offset])
+
+    objects = {}
+    for kind, keys, specs in groups:
+        columns = []
+        for spec in specs:
+            if spec[0] == 'j':
+                columns.append([_from_json(v) for v in spec[1]])
+                continue
+            column = array(spec[0])
+            end = offset + spec[1] * column.itemsize
+            column.frombytes(data[offset:end])
+            if sys.byteorder != 'little':
+                column.byteswap()
+            offset = end
+            columns.append(column.tolist())
+        objects.setdefault(kind, []).extend(
+            dict(zip(keys, values)) for values in zip(*columns)
+        )
+    return objects
+
+
+class LayoutCache:
+    """On-disk, size-bounded LRU cache of parsed page objects"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        """
+        Args:
+            cache_dir: Cache directory (created if missing)
+            max_bytes: Size budget; least recently used pages are evicted
+                       beyond it
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, doc_hash: str, page_num: int) -> Path:
+        return self.cache_dir / PARSER_VERSION / doc_hash[:2] / doc_hash / f"{page_num}.bin"
+
+    def _entries(self) -> List[Tuple[Path, os.stat_result]]:
+        entries = []
+        for path in self.cache_dir.rglob('*.bin'):
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                # Evicted by another worker
+                continue
+        return entries
+
+    @contextmanager
+    def _locked(self):
+        """Hold the cache-wide lock (shared by every process using the directory)"""
+        with open(self.cache_dir / LOCK_FILE, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # Released when the file is closed
+            yield
+
+    def _read_size(self) -> int:
+        """Running total from the size file; counted once if it is missing"""
+        try:
+            return int((self.cache_dir / SIZE_FILE).read_text())
+        except (FileNotFoundError, ValueError):
+            return sum(st.st_size for _, st in self._entries())
+
+    def _write_size(self, size: int):
+        tmp_path = self.cache_dir / f"{SIZE_FILE}.{os.getpid()}.tmp"
+        tmp_path.write_text(str(max(0, size)))
+        os.replace(tmp_path, self.cache_dir / SIZE_FILE)
+
+    def size(self) -> int:
+        """Total bytes currently cached"""
+        with self._locked():
+            size = self._read_size()
+            self._write_size(size)
+        return size
+
+    def get(self, doc_hash: str, page_num: int) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Cached objects for a page, or None on a miss"""
+        path = self._path(doc_hash, page_num)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # mtime tracks recency for LRU eviction (atime is often disabled)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return decode_objects(data)
+
+    def put(self, doc_hash: str, page_num: int,
+            objects: Dict[str, List[Dict[str, Any]]]):
+        """Store a page's objects, evicting old entries if over budget"""
+        data = encode_objects(objects)
+        path = self._path(doc_hash, page_num)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._locked():
+            # A missing size file is rebuilt by a scan that already sees
+            # this write; otherwise only the change in bytes is added
+            rescan = not (self.cache_dir / SIZE_FILE).exists()
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+
+            # Write then rename so concurrent readers never see partial files
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            size = self._read_size() if rescan else self._read_size() + len(data) - replaced
+            self._write_size(size)
+
+        if size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes: int = None):
+        """
+        Delete least recently used pages until the cache fits
+
+        Args:
+            target_bytes: Size to shrink to (default: 90% of max_bytes,
+                          so eviction does not run on every write)
+        """
+        target_bytes = int(self.max_bytes * 0.9) if target_bytes is None else target_bytes
+
+        with self._locked():
+            # The scan also corrects any drift in the running total
+            entries = sorted(self._entries(), key=lambda e: e[1].st_mtime)
+            size = sum(st.st_size for _, st in entries)
+
+            for path, st in entries:
+                if size <= target_bytes:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                size -= st.st_size
+
+            self._write_size(size)
+
+    def clear(self):
+        """Remove every cached page"""
+        self.evict(target_bytes=0)
@@ -4,65 +4,367 @@ PDF Table Extraction using pdfplumber
 """
 import pdfplumber
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 import time
 
+from methods.json_writer import write_tables_json
+from methods.page_index import parse_pages, page_has_table, split_pages
+from methods.pdf_source import PdfInput, PdfSource, pdf_source, pdf_name, pdf_handle
+from methods.profiling import current_rss_mb
+from methods.regions import Regions, normalize_regions, plumber_bbox
+from methods.traditional.layout_cache import LayoutCache, file_hash
+from methods.traditional.table_profiles import (
+    PROFILES, ProfileCache, layout_class, select_profile, template_fingerprint
+)
+
+PageResult = Tuple[int, Optional[List], Optional[str]]
+PageResults = List[PageResult]
+
+
+def _new_stats() -> Dict[str, Any]:
+    return {'peak_rss_mb': 0, 'cache_hits': 0, 'cache_misses': 0}
+
+
+def _iter_page_tables(pdf_path: Union[str, PdfSource], page_nums: List[int],
+                      options: Dict[str, Any] = None,
+                      stats: Dict[str, Any] = None) -> Iterator[PageResult]:
+    """
+    Extract raw tables from the given pages of one PDF, one page at a time
+    
+    Args:
+        pdf_path: Path to PDF file, or a PdfSource (read in place)
+        page_nums: 1-based pages to process
+        options: 'prefilter' (bool), 'prefilter_settings' (dict of
+                 page_has_table thresholds), 'stream' (bool),
+                 'page_window' (pages per open handle when streaming),
+                 'cache_dir'/'cache_max_bytes'/'file_hash' (layout cache),
+                 'table_settings' (dict), 'auto_profile' (bool),
+                 'profile_cache' (path of a ProfileCache JSON) and
+                 'regions' (page -> bboxes; pages listed there only have
+                 those areas searched, and bypass the pre-filter)
+        stats: Dict updated in place with 'peak_rss_mb' (highest RSS
+               sampled after each page), 'cache_hits' and 'cache_misses'
+    
+    Yields:
+        (page_num, page_tables, profile) in the order of page_nums, with
+        page_tables None for pages skipped by the pre-filter and profile
+        the table_settings profile used (None for explicit settings)
+    """
+    options = options or {}
+    stats = _new_stats() if stats is None else stats
+    prefilter = options.get('prefilter', False)
+    prefilter_settings = options.get('prefilter_settings') or {}
+    stream = options.get('stream', False)
+    regions = options.get('regions') or {}
+    
+    cache = None
+    if options.get('cache_dir'):
+        cache = LayoutCache(options['cache_dir'], options['cache_max_bytes'])
+        doc_hash = options.get('file_hash') or (
+            pdf_path.sha256() if isinstance(pdf_path, PdfSource) else file_hash(pdf_path)
+        )
+    
+    auto_profile = options.get('auto_profile', False)
+    profile_cache = ProfileCache(options.get('profile_cache')) if auto_profile else None
+    
+    # Streaming drops each page's parsed objects once it is done, and
+    # reopens the file every page_window pages so pdfminer's document-level
+    # object and font caches cannot grow with page count
+    window = max(1, options.get('page_window') or 1) if stream else max(1, len(page_nums))
+    
+    stats['peak_rss_mb'] = max(stats['peak_rss_mb'], current_rss_mb())
+    for start in range(0, len(page_nums), window):
+        with pdf_handle(pdf_path) as handle, pdfplumber.open(handle) as pdf:
+            fingerprint = template_fingerprint(pdf) if auto_profile else None
+            
+            for page_num in page_nums[start:start + window]:
+                page = pdf.pages[page_num - 1]
+                
+                if cache is not None:
+                    objects = cache.get(doc_hash, page_num)
+                    if objects is not None:
+                        # Seed pdfplumber's object cache so the page is never
+                        # laid out through pdfminer
+                        page._objects = objects
+                    else:
+                        cache.put(doc_hash, page_num, page.objects)
+                
+                page_regions = regions.get(page_num)
+                
+                if (prefilter and page_regions is None and
+                        not page_has_table(page, **prefilter_settings)):
+                    if stream:
+                        page.close()
+                    yield page_num, None, None
+                    continue
+                
+                # One pass per page: the template's cached winner for this
+                # layout, else the feature-based choice
+                profile = None
+                table_settings = options.get('table_settings')
+                if auto_profile:
+                    layout = layout_class(page)
+                    profile = (profile_cache.get(fingerprint, layout) or
+                               select_profile(page, layout))
+                    table_settings = PROFILES[profile]
+                
+                if page_regions is None:
+                    page_tables = page.extract_tables(table_settings)
+                else:
+                    # Search only the given areas, in region order
+                    page_tables = []
+                    for bbox in page_regions:
+                        bbox = plumber_bbox(bbox, page)
+                        if bbox is not None:
+                            page_tables.extend(page.crop(bbox).extract_tables(table_settings))
+                
+                if stream:
+                    page.close()
+                stats['peak_rss_mb'] = max(stats['peak_rss_mb'], current_rss_mb())
+                if cache is not None:
+                    stats['cache_hits'] = cache.hits
+                    stats['cache_misses'] = cache.misses
+                
+                yield page_num, page_tables, profile
+
+
+def _extract_page_tables(pdf_path: str, page_nums: List[int],
+                         options: Dict[str, Any] = None) -> Tuple[PageResults, Dict[str, Any]]:
+    """
+    Extract raw tables from the given pages of one PDF
+    
+    Module-level so it can run in a worker process; each call opens
+    the file independently.
+    
+    Returns:
+        (results, stats) as yielded and filled by _iter_page_tables
+    """
+    stats = _new_stats()
+    results = list(_iter_page_tables(pdf_path, page_nums, options, stats))
+    return results, stats
+
+
 class PDFPlumberExtractor:
     """Extract tables from PDF using pdfplumber"""
     
-    def __init__(self, verbose: bool = True):
+    def __init__(self, verbose: bool = True, workers: int = 1,
+                 min_pages_per_worker: int = 8, prefilter: bool = False,
+                 prefilter_settings: Dict[str, Any] = None,
+                 stream: bool = False, page_window: int = 50,
+                 cache_dir: str = None, cache_max_bytes: int = 2 * 1024 ** 3,
+                 table_settings: Dict[str, Any] = None, auto_profile: bool = False,
+                 profile_cache: str = None):
+        """
+        Args:
+            verbose: Print progress
+            workers: Worker processes for page-parallel extraction
+                     (1 = serial, 0 = one per CPU)
+            min_pages_per_worker: Below this many pages per worker,
+                                  fewer workers are used
+            prefilter: Skip extract_tables on pages the cheap classifier
+                       says hold no table
+            prefilter_settings: Thresholds for page_has_table
+            stream: Release each page's cached objects after extraction
+                    for a flat memory profile on long documents
+            page_window: Pages processed per open file handle when streaming
+            cache_dir: Directory for the persistent parsed-layout cache
+                       (None disables it)
+            cache_max_bytes: Cache size budget, enforced by LRU eviction
+            table_settings: pdfplumber table_settings for every page
+            auto_profile: Pick a named table_settings profile per page
+                          (overrides table_settings)
+            profile_cache: JSON file of winning profiles per template,
+                           filled by table_profiles.tune_profiles
+        """
         self.verbose = verbose
         self.extraction_time = 0
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.min_pages_per_worker = max(1, min_pages_per_worker)
+        self.prefilter = prefilter
+        self.prefilter_settings = prefilter_settings or {}
+        self.stream = stream
+        self.page_window = max(1, page_window)
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.table_settings = table_settings
+        self.auto_profile = auto_profile
+        self.profile_cache = profile_cache
+        self.pages_processed = 0
+        self.skipped_pages = []
+        self.peak_rss_mb = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
     
-    def extract_tables(self, pdf_path: str) -> List[Dict[str, Any]]:
+    def _options(self, doc_hash: str = None, regions: Regions = None) -> Dict[str, Any]:
+        """Per-page extraction options passed to (worker) page extraction"""
+        return {
+            'prefilter': self.prefilter,
+            'prefilter_settings': self.prefilter_settings,
+            'stream': self.stream,
+            'page_window': self.page_window,
+            'cache_dir': self.cache_dir,
+            'cache_max_bytes': self.cache_max_bytes,
+            'file_hash': doc_hash,
+            'table_settings': self.table_settings,
+            'auto_profile': self.auto_profile,
+            'profile_cache': self.profile_cache,
+            'regions': regions,
+        }
+    
+    def _iter_parallel(self, source: PdfSource, page_nums: List[int],
+                       options: Dict[str, Any], stats: Dict[str, Any]) -> Iterator[PageResult]:
         """
-        Extract all tables from a PDF file
+        Extract page ranges in worker processes, yielded in page order
+        
+        Each range is yielded as soon as it and all earlier ranges are
+        done. The reported peak RSS is the largest of any single worker.
+        Workers open the document by path, so in-memory input is written
+        to the source's temp file once and shared by all of them.
+        """
+        num_workers = min(self.workers, len(page_nums) // self.min_pages_per_worker)
+        if num_workers <= 1:
+            yield from _iter_page_tables(source, page_nums, options, stats)
+            return
+        
+        # A few chunks per worker keeps the pool busy when pages differ in cost
+        chunks = split_pages(page_nums, min(len(page_nums), num_workers * 4))
+        
+        if self.verbose:
+            print(f"  Parallel: {len(page_nums)} pages, {num_workers} workers, "
+                  f"{len(chunks)} ranges")
+        
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            for chunk, chunk_stats in pool.map(_extract_page_tables,
+                                               [source.path] * len(chunks), chunks,
+                                               [options] * len(chunks)):
+                stats['peak_rss_mb'] = max(stats['peak_rss_mb'], chunk_stats['peak_rss_mb'])
+                stats['cache_hits'] += chunk_stats['cache_hits']
+                stats['cache_misses'] += chunk_stats['cache_misses']
+                yield from chunk
+    
+    def iter_tables(self, pdf_path: PdfInput, pages: str = 'all',
+                    regions: Regions = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield tables as soon as their page is finished
+        
+        Same tables, in the same order, as extract_tables. Page statistics
+        and extraction_time are final once the generator is exhausted.
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object (read in place, no temp file)
+            pages: Pages to process ('all' or '1,2,3' or '1-3')
+            regions: Table areas per page, (x0, top, x1, bottom) in PDF
+                     points from the top-left (see methods.regions). Only
+                     pages with regions are processed, and only inside them.
             
-        Returns:
-            List of extracted tables with metadata
+        Yields:
+            Table dicts with metadata
         """
         start_time = time.time()
-        tables = []
+        self.pages_processed = 0
+        self.skipped_pages = []
+        self.peak_rss_mb = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        stats = _new_stats()
         
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                if self.verbose:
-                    print(f"Processing {Path(pdf_path).name} ({len(pdf.pages)} pages)")
+        with pdf_source(pdf_path) as source:
+            with pdfplumber.open(source.handle()) as pdf:
+                num_pages = len(pdf.pages)
+            
+            if self.verbose:
+                print(f"Processing {Path(source.name).name} ({num_pages} pages)")
+            
+            page_nums = parse_pages(pages, num_pages)
+            regions = normalize_regions(regions)
+            if regions is not None:
+                page_nums = [p for p in page_nums if p in regions]
+            
+            # Hash once here rather than in every worker
+            options = self._options(source.sha256() if self.cache_dir else None, regions)
+            
+            if self.workers > 1:
+                page_results = self._iter_parallel(source, page_nums, options, stats)
+            else:
+                page_results = _iter_page_tables(source, page_nums, options, stats)
+            
+            for page_num, page_tables, profile in page_results:
+                self.peak_rss_mb = stats['peak_rss_mb']
+                self.cache_hits = stats['cache_hits']
+                self.cache_misses = stats['cache_misses']
                 
-                for page_num, page in enumerate(pdf.pages, 1):
-                    # Extract tables from page
-                    page_tables = page.extract_tables()
-                    
-                    for table_idx, table_data in enumerate(page_tables):
-                        if table_data:  # Skip empty tables
-                            table_info = {
-                                'page': page_num,
-                                'table_index': table_idx,
-                                'data': table_data,
-                                'num_rows': len(table_data),
-                                'num_cols': len(table_data[0]) if table_data else 0,
-                            }
-                            tables.append(table_info)
-                            
-                            if self.verbose:
-                                print(f"  Page {page_num}, Table {table_idx}: "
-                                      f"{table_info['num_rows']}x{table_info['num_cols']}")
+                if page_tables is None:
+                    self.skipped_pages.append(page_num)
+                    continue
+                self.pages_processed += 1
+                
+                for table_idx, table_data in enumerate(page_tables):
+                    if table_data:  # Skip empty tables
+                        table_info = {
+                            'page': page_num,
+                            'table_index': table_idx,
+                            'data': table_data,
+                            'num_rows': len(table_data),
+                            'num_cols': len(table_data[0]) if table_data else 0,
+                        }
+                        if profile:
+                            table_info['profile'] = profile
+                        
+                        if self.verbose:
+                            print(f"  Page {page_num}, Table {table_idx}: "
+                                  f"{table_info['num_rows']}x{table_info['num_cols']}")
+                        
+                        yield table_info
+            
+            self.peak_rss_mb = stats['peak_rss_mb']
+            self.cache_hits = stats['cache_hits']
+            self.cache_misses = stats['cache_misses']
         
+        self.extraction_time = time.time() - start_time
+    
+    def extract_tables(self, pdf_path: PdfInput, pages: str = 'all',
+                       regions: Regions = None) -> List[Dict[str, Any]]:
+        """
+        Extract all tables from a PDF file
+        
+        Args:
+            pdf_path: Path to PDF file, or in-memory PDF (see iter_tables)
+            pages: Pages to process ('all' or '1,2,3' or '1-3')
+            regions: Table areas per page (see iter_tables)
+            
+        Returns:
+            List of extracted tables with metadata
+        """
+        try:
+            tables = list(self.iter_tables(pdf_path, pages=pages, regions=regions))
         except Exception as e:
-            print(f"Error processing {pdf_path}: {e}")
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
             return []
         
-        self.extraction_time = time.time() - start_time
-        
         if self.verbose:
+            if self.prefilter:
+                print(f"  Pre-filter skipped {len(self.skipped_pages)} of "
+                      f"{len(self.skipped_pages) + self.pages_processed} pages")
+            if self.cache_dir:
+                print(f"  Layout cache: {self.cache_hits} hits, {self.cache_misses} misses")
+            print(f"  Peak RSS: {self.peak_rss_mb:.1f} MB")
             print(f"Extracted {len(tables)} tables in {self.extraction_time:.2f}s\n")
         
         return tables
     
+    def _json_metadata(self) -> Dict[str, Any]:
+        """Run metadata written alongside the tables (tables_to_json, extract_to_file)"""
+        return {
+            'extraction_time': self.extraction_time,
+            'pages_processed': self.pages_processed,
+            'pages_skipped': len(self.skipped_pages),
+            'peak_rss_mb': self.peak_rss_mb
+        }
+    
     def tables_to_json(self, tables: List[Dict[str, Any]], 
                        include_metadata: bool = True) -> str:
         """
@@ -78,7 +380,7 @@ class PDFPlumberExtractor:
         if include_metadata:
             output = {
                 'num_tables': len(tables),
-                'extraction_time': self.extraction_time,
+                **self._json_metadata(),
                 'tables': tables
             }
         else:
@@ -86,38 +388,41 @@ class PDFPlumberExtractor:
         
         return json.dumps(output, indent=2)
     
-    def extract_to_file(self, pdf_path: str, output_path: str):
+    def extract_to_file(self, pdf_path: PdfInput, output_path: str, pages: str = 'all'):
         """
         Extract tables and save to JSON file
         
         Args:
             pdf_path: Input PDF path
             output_path: Output JSON path
+            pages: Pages to process
         """
-        tables = self.extract_tables(pdf_path)
-        json_output = self.tables_to_json(tables)
-        
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w') as f:
-            f.write(json_output)
+        # Each table is written as soon as its page is done, the metadata
+        # once the iterator finishes
+        tables = self.iter_tables(pdf_path, pages=pages)
+        try:
+            num_tables = write_tables_json(output_path, tables, final_metadata=self._json_metadata)
+        except Exception as e:
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
+            return
         
         if self.verbose:
-            print(f"Saved to {output_file}")
+            print(f"Saved {num_tables} tables to {output_path}")
 
 def main():
     """Example usage"""
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python pdfplumber_extractor.py <pdf_file> [output.json]")
+        print("Usage: python pdfplumber_extractor.py <pdf_file> [output.json] [workers]")
+        print("  workers: worker processes for page-parallel mode (0 = all CPUs, default: 1)")
         sys.exit(1)
     
     pdf_file = sys.argv[1]
     output_file = sys.argv[2] if len(sys.argv) > 2 else "output.json"
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
     
-    extractor = PDFPlumberExtractor(verbose=True)
+    extractor = PDFPlumberExtractor(verbose=True, workers=workers)
     extractor.extract_to_file(pdf_file, output_file)
 
 if __name__ == "__main__":
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Named pdfplumber table_settings profiles with per-page selection
+
+Ruled statements and whitespace-aligned notes need different line/text
+strategies. Instead of running extract_tables several times per page,
+each page gets one profile, chosen either from a cache of winners for
+its template (issuer/layout fingerprint) or from cheap geometric
+features. tune_profiles() fills the cache with trial runs on a few
+sample pages of a new template.
+"""
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple
+
+from methods.page_index import page_table_features
+from methods.pdf_source import PdfInput, pdf_source
+
+PROFILES = {
+    # Fully ruled grids
+    'lines': {
+        'vertical_strategy': 'lines',
+        'horizontal_strategy': 'lines',
+    },
+    # Statements with horizontal rules (headers, totals) but no column rules
+    'hrules': {
+        'vertical_strategy': 'text',
+        'horizontal_strategy': 'lines',
+        'min_words_vertical': 3,
+    },
+    # Whitespace-aligned tables with no rules at all
+    'text': {
+        'vertical_strategy': 'text',
+        'horizontal_strategy': 'text',
+        'snap_tolerance': 3,
+        'join_tolerance': 3,
+        'min_words_vertical': 3,
+        'min_words_horizontal': 1,
+    },
+}
+
+DEFAULT_PROFILE = 'lines'
+
+
+def rule_counts(page, max_thickness: float = 2.0) -> Dict[str, int]:
+    """
+    Count horizontal and vertical ruling evidence on a pdfplumber page
+
+    Thin rects count as rules in their long direction; larger rects
+    (cell borders drawn as boxes) count in both.
+    """
+    horizontal = vertical = 0
+    for line in page.lines:
+        if abs(line['top'] - line['bottom']) <= max_thickness:
+            horizontal += 1
+        elif abs(line['x0'] - line['x1']) <= max_thickness:
+            vertical += 1
+    for rect in page.rects:
+        if rect['height'] <= max_thickness:
+            horizontal += 1
+        elif rect['width'] <= max_thickness:
+            vertical += 1
+        else:
+            horizontal += 2
+            vertical += 2
+    return {'horizontal': horizontal, 'vertical': vertical}
+
+
+_NUMBER = rb'([-+]?(?:\d+\.?\d*|\.\d+))'
+# "x y w h re", unless it only sets a clipping path ("re W n")
+RECT_OP = re.compile(rb'\s+'.join([_NUMBER] * 4) + rb'\s+re\b(?!\s*W)')
+# "x0 y0 m x1 y1 l": a single straight segment
+LINE_OP = re.compile(_NUMBER + rb'\s+' + _NUMBER + rb'\s+m\s+' +
+                     _NUMBER + rb'\s+' + _NUMBER + rb'\s+l\b')
+
+
+def stream_rule_counts(content: bytes, max_thickness: float = 2.0) -> Dict[str, int]:
+    """
+    Count ruling evidence in raw content-stream bytes, as rule_counts does
+
+    Only the path operators are matched: text is neither decoded nor
+    laid out, so this costs a small fraction of a pdfminer parse.
+    Transformation matrices are ignored.
+    """
+    horizontal = vertical = 0
+    for match in RECT_OP.finditer(content):
+        width, height = abs(float(match.group(3))), abs(float(match.group(4)))
+        if height <= max_thickness:
+            horizontal += 1
+        elif width <= max_thickness:
+            vertical += 1
+        else:
+            horizontal += 2
+            vertical += 2
+    for match in LINE_OP.finditer(content):
+        x0, y0, x1, y1 = (float(v) for v in match.groups())
+        if abs(y0 - y1) <= max_thickness:
+            horizontal += 1
+        elif abs(x0 - x1) <= max_thickness:
+            vertical += 1
+    return {'horizontal': horizontal, 'vertical': vertical}
+
+
+def page_content(page) -> bytes:
+    """Decoded content streams of a pypdf page and of the forms it draws"""
+    streams = []
+    contents = page.get('/Contents')
+    if contents is not None:
+        contents = contents.get_object()
+        streams.extend(contents if isinstance(contents, list) else [contents])
+
+    resources = page.get('/Resources')
+    xobjects = resources.get_object().get('/XObject') if resources is not None else None
+    if xobjects is not None:
+        for xobject in xobjects.get_object().values():
+            xobject = xobject.get_object()
+            if xobject.get('/Subtype') == '/Form':
+                streams.append(xobject)
+
+    return b'\n'.join(stream.get_object().get_data() for stream in streams)
+
+
+def rules_flavor(rules: Dict[str, int], min_rules: int = 3) -> str:
+    """
+    Lattice or stream for a page, from its rule counts
+
+    Lattice parsers (Tabula, Camelot) build cells from rules, so they
+    only pay off when a page has both horizontal and vertical rules;
+    everything else is parsed from text alignment.
+
+    Returns:
+        'lattice' or 'stream'
+    """
+    if rules['horizontal'] >= min_rules and rules['vertical'] >= min_rules:
+        return 'lattice'
+    return 'stream'
+
+
+def ruling_flavor(page, min_rules: int = 3) -> str:
+    """Lattice or stream for a pdfplumber page (see rules_flavor)"""
+    return rules_flavor(rule_counts(page), min_rules)
+
+
+def page_flavors(pdf_path: PdfInput, page_nums: Iterable[int],
+                 min_rules: int = 3) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_num, 'lattice' | 'stream') for each page, in order
+
+    Scans each page's content stream for path operators through pypdf
+    (see stream_rule_counts) instead of parsing the page with pdfminer,
+    so deciding a flavor costs far less than extracting the page.
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        from PyPDF2 import PdfReader
+
+    with pdf_source(pdf_path) as source:
+        reader = PdfReader(source.handle())
+        for page_num in page_nums:
+            rules = stream_rule_counts(page_content(reader.pages[page_num - 1]))
+            yield page_num, rules_flavor(rules, min_rules)
+
+
+# Feature-based choice per layout class, used when the template has no winner
+LAYOUT_PROFILES = {
+    'grid': 'lines',
+    'hrules': 'hrules',
+    'unruled': 'text',
+    'prose': DEFAULT_PROFILE,
+}
+
+
+def layout_class(page, min_rules: int = 3, min_numeric_columns: int = 2) -> str:
+    """
+    Coarse layout bucket of a page from cheap geometric features
+
+    Returns:
+        'grid' (horizontal and vertical rules), 'hrules' (horizontal
+        rules only), 'unruled' (aligned numeric columns, no rules) or
+        'prose' (neither)
+    """
+    rules = rule_counts(page)
+    if rules_flavor(rules, min_rules) == 'lattice':
+        return 'grid'
+    if rules['horizontal'] >= min_rules:
+        return 'hrules'
+    if page_table_features(page)['num_numeric_columns'] >= min_numeric_columns:
+        return 'unruled'
+    return 'prose'
+
+
+def select_profile(page, layout: str = None) -> str:
+    """
+    Pick a profile for a page from its layout class
+
+    Args:
+        page: pdfplumber Page
+        layout: Precomputed layout_class(page)
+
+    Returns:
+        Profile name
+    """
+    return LAYOUT_PROFILES[layout or layout_class(page)]
+
+
+def template_fingerprint(pdf) -> str:
+    """
+    Fingerprint of a document's template from metadata and page 1 setup
+
+    Uses the producing software, page size and the fonts declared in the
+    first page's resources, none of which require a content parse.
+    Filings from one issuer and year typically share a fingerprint.
+    """
+    meta = pdf.metadata or {}
+    parts = [str(meta.get('Producer', '')), str(meta.get('Creator', ''))]
+
+    if pdf.pages:
+        first = pdf.pages[0]
+        parts.append(f"{round(first.width)}x{round(first.height)}")
+        try:
+            fonts = first.page_obj.resources.get('Font') or {}
+            if hasattr(fonts, 'resolve'):
+                fonts = fonts.resolve()
+            names = []
+            for font in fonts.values():
+                font = font.resolve() if hasattr(font, 'resolve') else font
+                name = font.get('BaseFont') if isinstance(font, dict) else None
+                names.append(getattr(name, 'name', str(name)))
+            # Subset prefixes (ABCDEF+Font) differ per file; drop them
+            parts.extend(sorted({n.split('+')[-1] for n in names if n}))
+        except Exception:
+            pass
+
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+
+def score_tables(tables: List[List[List[Any]]]) -> float:
+    """
+    Score a profile's output on a page; used to pick a winner
+
+    Text captured in tables of at least 2x2, weighted by the share of
+    non-empty cells. Counting characters rather than cells means that
+    splitting a label across columns earns nothing, and the fill weight
+    makes over-segmented grids of mostly empty cells score low.
+    """
+    score = 0.0
+    for table in tables:
+        num_cols = max((len(row) for row in table), default=0)
+        if len(table) < 2 or num_cols < 2:
+            continue
+        cells = [str(cell).strip() for row in table for cell in row if cell is not None]
+        filled = sum(1 for cell in cells if cell)
+        chars = sum(len(cell) for cell in cells)
+        score += chars * filled / (len(table) * num_cols)
+    return score
+
+
+class ProfileCache:
+    """Winning profile per (template fingerprint, layout class), saved as JSON"""
+
+    def __init__(self, path: str = None):
+        self.path = Path(path) if path else None
+        self.winners = {}
+        if self.path and self.path.exists():
+            with open(self.path) as f:
+                self.winners = json.load(f)
+
+    def get(self, fingerprint: str, layout: str) -> Optional[str]:
+        return self.winners.get(fingerprint, {}).get(layout)
+
+    def set(self, fingerprint: str, layout: str, profile: str):
+        self.winners.setdefault(fingerprint, {})[layout] = profile
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump(self.winners, f, indent=2)
+
+
+def tune_profiles(pdf_path: str, cache: ProfileCache, pages: List[int] = None,
+                  max_pages_per_layout: int = 3, min_gain: float = 0.1) -> Dict[str, str]:
+    """
+    Run every profile on a few sample pages and cache the winners
+
+    This is the only place profiles are tried against each other; call
+    it once per new template, then extraction makes one pass per page.
+
+    Args:
+        pdf_path: Representative PDF of the template
+        cache: ProfileCache to update (saved on return)
+        pages: Candidate pages (default: all)
+        max_pages_per_layout: Sample pages scored per layout class
+        min_gain: Relative score margin another profile needs to replace
+                  the layout's default choice
+
+    Returns:
+        Winning profile per layout class ('prose' is never tuned)
+    """
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        fingerprint = template_fingerprint(pdf)
+        page_nums = pages or range(1, len(pdf.pages) + 1)
+
+        scores = {}
+        sampled = {}
+        for page_num in page_nums:
+            page = pdf.pages[page_num - 1]
+            layout = layout_class(page)
+            # Prose pages always use the default profile
+            if layout == 'prose' or sampled.get(layout, 0) >= max_pages_per_layout:
+                page.close()
+                continue
+            sampled[layout] = sampled.get(layout, 0) + 1
+
+            layout_scores = scores.setdefault(layout, {})
+            for name, settings in PROFILES.items():
+                layout_scores[name] = (layout_scores.get(name, 0) +
+                                       score_tables(page.extract_tables(settings)))
+            page.close()
+
+    winners = {}
+    for layout, layout_scores in scores.items():
+        best = LAYOUT_PROFILES[layout]
+        for name, score in layout_scores.items():
+            if score > layout_scores[best] * (1 + min_gain):
+                best = name
+        if layout_scores[best] > 0:
+            winners[layout] = best
+            cache.set(fingerprint, layout, best)
+
+    cache.save()
+    return winners
+
+
+def main():
+    """Tune profiles for the template of a PDF"""
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python table_profiles.py <pdf_file> <profile_cache.json>")
+        sys.exit(1)
+
+    cache = ProfileCache(sys.argv[2])
+    winners = tune_profiles(sys.argv[1], cache)
+    for layout, profile in winners.items():
+        print(f"  {layout}: {profile}")
+    print(f"Saved to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
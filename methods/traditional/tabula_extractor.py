@@ -1,102 +1,309 @@
 #!/usr/bin/env python3
 """
 PDF Table Extraction using Tabula
+
+With jpype installed, tabula-py runs tabula-java in one JVM inside this
+process, started on first use and kept until the process exits; without
+it, every read_pdf call launches a new `java` process. The extractor
+starts the in-process JVM up front with its heap/thread settings, so
+per-document cost is extraction only.
 """
 import tabula
 import json
+import multiprocessing
+import os
+import subprocess
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Iterable, Callable, Tuple, Union
 import time
 
+from methods.json_writer import write_tables_json
+from methods.page_index import format_pages, resolve_pages
+from methods.pdf_source import PdfInput, pdf_source, pdf_name
+from methods.regions import Regions, normalize_regions, tabula_area
+from methods.traditional.table_profiles import page_flavors
+
+try:
+    import jpype
+    JPYPE_AVAILABLE = True
+except ImportError:
+    JPYPE_AVAILABLE = False
+
+# Java availability, checked once per process
+_java_available = None
+
+# 'both': lattice and stream on every page, keep the pass with more tables
+# 'auto': lattice on pages with ruling lines, stream elsewhere; one pass per flavor
+METHODS = ('both', 'auto', 'lattice', 'stream')
+
+
+def java_available() -> bool:
+    """
+    Whether tabula can run Java from this process (checked once)
+    
+    With jpype, a running JVM or a locatable libjvm counts; otherwise
+    the `java` executable must run.
+    """
+    global _java_available
+    if _java_available is not None:
+        return _java_available
+    
+    if JPYPE_AVAILABLE:
+        if jpype.isJVMStarted():
+            _java_available = True
+            return True
+        try:
+            jpype.getDefaultJVMPath()
+            _java_available = True
+            return True
+        except jpype.JVMNotFoundException:
+            pass
+    
+    try:
+        subprocess.run(['java', '-version'],
+                       capture_output=True, check=True, timeout=5)
+        _java_available = True
+    except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+        _java_available = False
+    return _java_available
+
+
+def jvm_options(heap: str = None, threads: int = None,
+                extra: List[str] = None) -> List[str]:
+    """
+    JVM options for tabula-java
+    
+    Args:
+        heap: Maximum heap size, e.g. '512m' or '2g' (-Xmx)
+        threads: CPUs the JVM may use; bounds its GC and JIT compiler
+                 threads when several workers share a machine
+        extra: Additional raw JVM options
+        
+    Returns:
+        Option list for tabula.read_pdf(java_options=...) / start_jvm
+    """
+    options = ['-Dfile.encoding=UTF8']
+    if heap:
+        options.append(f'-Xmx{heap}')
+    if threads:
+        options.append(f'-XX:ActiveProcessorCount={threads}')
+    if extra:
+        options.extend(extra)
+    return options
+
+
+def start_jvm(java_options: List[str], silent: bool = True) -> bool:
+    """
+    Start tabula's in-process JVM now rather than on the first read_pdf
+    
+    jpype allows one JVM per process and it cannot be restarted, so the
+    options only take effect if no JVM is running yet.
+    
+    Returns:
+        True if an in-process JVM is running; False if jpype is missing
+        or cannot load libjvm (only a `java` executable is available)
+    """
+    if not JPYPE_AVAILABLE:
+        return False
+    
+    if not jpype.isJVMStarted():
+        from tabula.backend import TabulaVm
+        try:
+            TabulaVm(java_options=list(java_options), silent=silent)
+        except (jpype.JVMNotFoundException, OSError, RuntimeError):
+            return False
+    return jpype.isJVMStarted()
+
+
+# Extractor of a batch worker process, created once per worker (and JVM)
+_batch_extractor = None
+
+
+def _init_batch_worker(settings: Dict[str, Any]):
+    global _batch_extractor
+    _batch_extractor = TabulaExtractor(verbose=False, **settings)
+
+
+def _batch_extract(job: tuple) -> Dict[str, Any]:
+    """Extract one file of a batch in a worker; errors are returned, not raised"""
+    pdf_path, pages, method = job
+    start = time.time()
+    try:
+        tables = list(_batch_extractor.iter_tables(pdf_path, pages=pages, method=method))
+        error = None
+    except Exception as e:
+        tables, error = [], str(e)
+    
+    return {
+        'pdf_path': pdf_path,
+        'tables': tables,
+        'num_tables': len(tables),
+        'extraction_time': time.time() - start,
+        'worker_pid': os.getpid(),
+        'error': error
+    }
+
+
 class TabulaExtractor:
     """Extract tables from PDF using Tabula-py"""
     
-    def __init__(self, verbose: bool = True):
+    def __init__(self, verbose: bool = True, jvm_heap: str = None,
+                 jvm_threads: int = None, java_options: List[str] = None,
+                 eager_jvm: bool = True):
+        """
+        Args:
+            verbose: Print progress
+            jvm_heap: Maximum JVM heap, e.g. '1g'
+            jvm_threads: CPUs visible to the JVM (bounds GC/JIT threads)
+            java_options: Extra raw JVM options
+            eager_jvm: Start the in-process JVM now rather than on first
+                       use (extract_batch runs its own worker JVMs, so
+                       batch-only callers can skip it)
+        """
         self.verbose = verbose
         self.extraction_time = 0
+        self.jvm_settings = {'jvm_heap': jvm_heap, 'jvm_threads': jvm_threads,
+                             'java_options': java_options}
+        self.java_options = jvm_options(jvm_heap, jvm_threads, java_options)
+        self.persistent_jvm = False
+        self.page_methods = {}
+        self._jvm_checked = False
+        
+        if eager_jvm:
+            self._ensure_jvm()
+    
+    def _ensure_jvm(self):
+        """Start the in-process JVM if available (once per extractor)"""
+        if self._jvm_checked:
+            return
+        self._jvm_checked = True
+        
+        if java_available():
+            start = time.time()
+            self.persistent_jvm = start_jvm(self.java_options, silent=not self.verbose)
+            if self.verbose:
+                if self.persistent_jvm:
+                    print(f"Tabula JVM ready in-process ({time.time() - start:.2f}s)")
+                elif JPYPE_AVAILABLE:
+                    print("  ⚠ jpype cannot load libjvm (set JAVA_HOME) - "
+                          "each Tabula call starts a new JVM")
+                else:
+                    print("  ⚠ jpype not installed - each Tabula call starts a new JVM")
+                    print("    Install: uv pip install 'tabula-py[jpype]'")
     
-    def extract_tables(self, pdf_path: str, pages: str = 'all') -> List[Dict[str, Any]]:
+    def _read_pdf(self, path: str, pages, **kwargs) -> List[List[List[str]]]:
+        """
+        tabula.read_pdf with this extractor's JVM settings
+        
+        Tables come straight from tabula-java's JSON as rows of cell text,
+        without building (and type-converting) a DataFrame per table.
+        Tables with no rows are dropped.
+        """
+        return [rows for _, rows in self._read_pdf_pages(path, pages, **kwargs)]
+    
+    def _read_pdf_pages(self, path: str, pages, **kwargs) -> List[Tuple[int, List[List[str]]]]:
+        """Like _read_pdf, as (page, rows) pairs from tabula-java's page_number (-1 if absent)"""
+        self._ensure_jvm()
+        raw_tables = tabula.read_pdf(
+            path,
+            pages=pages,
+            output_format='json',
+            silent=not self.verbose,
+            # A running JVM ignores options (and tabula-py warns about
+            # them); a subprocess JVM needs them on every call
+            java_options=None if self.persistent_jvm else self.java_options,
+            # tabula-py would otherwise retry jpype and fail without libjvm
+            force_subprocess=not self.persistent_jvm and JPYPE_AVAILABLE,
+            **kwargs
+        )
+        return [(raw.get('page_number', -1), [[cell['text'] for cell in row] for row in raw['data']])
+                for raw in raw_tables if raw['data']]
+    
+    def extract_tables(self, pdf_path: PdfInput, pages: str = 'all',
+                       method: str = 'both', regions: Regions = None) -> List[Dict[str, Any]]:
         """
         Extract all tables from a PDF file
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or PDF bytes, memoryview, mmap or
+                      binary file object (Tabula reads from a path, so
+                      in-memory input goes through one shared temp file)
             pages: Pages to process ('all' or '1,2,3' or '1-3')
+            method: 'both' (lattice and stream over the whole document,
+                    keep the pass with more tables), 'auto' (lattice on pages
+                    with ruling lines, stream elsewhere; one pass per flavor),
+                    'lattice' or 'stream'
+            regions: Table areas per page, (x0, top, x1, bottom) in PDF
+                     points from the top-left (see methods.regions), read
+                     as Tabula areas. Only pages with regions are processed.
             
         Returns:
             List of extracted tables with metadata
         """
         start_time = time.time()
         tables = []
+        self.page_methods = {}
+        
+        pages = format_pages(pages)
+        if not pages:
+            # Page index says this document has no tables
+            self.extraction_time = 0
+            return []
         
         # Check if Java is available
-        import subprocess
-        try:
-            subprocess.run(['java', '-version'], 
-                         capture_output=True, check=True, timeout=5)
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+        if not java_available():
             if self.verbose:
                 print("  ⚠ Java not found - Tabula requires Java to be installed")
                 print("    Install: sudo apt install default-jre")
             return []
         
+        if method != 'both' or regions is not None:
+            # Per-page passes keep real page numbers (and take per-page areas)
+            try:
+                tables = list(self.iter_tables(pdf_path, pages=pages, method=method,
+                                               regions=regions))
+            except Exception as e:
+                print(f"Error processing {pdf_name(pdf_path)}: {e}")
+                return []
+            
+            if self.verbose:
+                num_lattice = sum(1 for m in self.page_methods.values() if m == 'lattice')
+                print(f"  Pages: {num_lattice} lattice, "
+                      f"{len(self.page_methods) - num_lattice} stream")
+                print(f"Extracted {len(tables)} tables in {self.extraction_time:.2f}s\n")
+            
+            return tables
+        
         try:
             # Extract tables using Tabula
             # lattice=True for tables with clear borders
             # stream=True for tables without borders
             
-            if self.verbose:
-                print(f"Processing {Path(pdf_path).name} (Tabula method)")
-            
-            # Try lattice method first (for bordered tables)
-            dfs_lattice = tabula.read_pdf(
-                pdf_path,
-                pages=pages,
-                lattice=True,
-                multiple_tables=True,
-                silent=not self.verbose
-            )
-            
-            # Try stream method (for borderless tables)
-            dfs_stream = tabula.read_pdf(
-                pdf_path,
-                pages=pages,
-                stream=True,
-                multiple_tables=True,
-                silent=not self.verbose
-            )
+            with pdf_source(pdf_path) as source:
+                if self.verbose:
+                    print(f"Processing {Path(source.name).name} (Tabula method)")
+                
+                # Try lattice method first (for bordered tables)
+                tables_lattice = self._read_pdf(source.path, pages, lattice=True)
+                
+                # Try stream method (for borderless tables)
+                tables_stream = self._read_pdf(source.path, pages, stream=True)
             
             # Combine results (prefer lattice if both found tables)
-            all_dfs = dfs_lattice if len(dfs_lattice) >= len(dfs_stream) else dfs_stream
-            method_used = 'lattice' if len(dfs_lattice) >= len(dfs_stream) else 'stream'
+            all_tables = tables_lattice if len(tables_lattice) >= len(tables_stream) else tables_stream
+            method_used = 'lattice' if len(tables_lattice) >= len(tables_stream) else 'stream'
             
             if self.verbose:
                 print(f"  Method used: {method_used}")
-                print(f"  Found {len(all_dfs)} tables")
+                print(f"  Found {len(all_tables)} tables")
             
-            # Convert DataFrames to our format
-            for idx, df in enumerate(all_dfs):
-                if df.empty:
-                    continue
-                
-                # Convert DataFrame to list of lists
-                table_data = [df.columns.tolist()] + df.values.tolist()
-                
-                table_info = {
-                    'page': -1,  # Tabula doesn't provide page info easily
-                    'table_index': idx,
-                    'data': table_data,
-                    'num_rows': len(table_data),
-                    'num_cols': len(table_data[0]) if table_data else 0,
-                    'method': method_used
-                }
-                tables.append(table_info)
-                
-                if self.verbose:
-                    print(f"  Table {idx}: {table_info['num_rows']}x{table_info['num_cols']}")
+            # Convert to our format
+            for idx, rows in enumerate(all_tables):
+                # Tabula doesn't provide page info for multi-page reads
+                tables.append(self._table_info(rows, idx, method_used, page=-1))
         
         except Exception as e:
-            print(f"Error processing {pdf_path}: {e}")
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
             return []
         
         self.extraction_time = time.time() - start_time
@@ -106,6 +313,184 @@ class TabulaExtractor:
         
         return tables
     
+    def _table_info(self, table_data: List[List[str]], idx: int, method_used: str,
+                    page: int) -> Dict[str, Any]:
+        """
+        Wrap a Tabula table's rows in our table dict
+        
+        The first row is kept as data, as Tabula found it (like Camelot,
+        no header row is inferred or renamed).
+        """
+        table_info = {
+            'page': page,
+            'table_index': idx,
+            'data': table_data,
+            'num_rows': len(table_data),
+            'num_cols': len(table_data[0]) if table_data else 0,
+            'method': method_used
+        }
+        
+        if self.verbose:
+            print(f"  Table {idx} (Page {page}): {table_info['num_rows']}x{table_info['num_cols']}")
+        
+        return table_info
+    
+    def iter_tables(self, pdf_path: PdfInput, pages: str = 'all',
+                    method: str = 'both', regions: Regions = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield tables page by page as each page is parsed
+        
+        Reads one page at a time, so tables carry their real page numbers.
+        Errors propagate to the caller; use extract_tables for the
+        error-handling wrapper.
+        
+        Args:
+            pdf_path: Path to PDF file, or in-memory PDF (see extract_tables)
+            pages: Pages to process ('all' or '1,2,3' or '1-3')
+            method: 'both' (lattice and stream per page, keep the pass with
+                    more tables), 'auto' (lattice if the page has ruling
+                    lines, else stream; one Tabula call per flavor covering
+                    all its pages, so its tables come at the end rather
+                    than page by page), 'lattice' or 'stream'
+            regions: Table areas per page (see extract_tables)
+            
+        Yields:
+            Table dictionaries, in page order
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown Tabula method: {method} (expected one of {METHODS})")
+        
+        start_time = time.time()
+        table_index = 0
+        self.page_methods = {}
+        
+        with pdf_source(pdf_path) as source:
+            if self.verbose:
+                print(f"Processing {Path(source.name).name} (Tabula {method} method, streaming)")
+            
+            page_nums = resolve_pages(source, pages)
+            regions = normalize_regions(regions)
+            if regions is not None:
+                page_nums = [p for p in page_nums if p in regions]
+            
+            if method == 'auto' and regions is None:
+                # Path operators in the content streams pick each page's
+                # flavor; each flavor then reads all its pages in one call
+                flavors = dict(page_flavors(source, page_nums))
+                self.page_methods = flavors
+                page_tables = []
+                for flavor in ('lattice', 'stream'):
+                    flavor_pages = [p for p in page_nums if flavors[p] == flavor]
+                    if flavor_pages:
+                        page_tables.extend(
+                            (page, flavor, rows) for page, rows in
+                            self._read_pdf_pages(source.path, format_pages(flavor_pages),
+                                                 **{flavor: True})
+                        )
+                
+                # Stable sort: tables of one page keep Tabula's order
+                page_tables.sort(key=lambda table: table[0])
+                for page_num, method_used, rows in page_tables:
+                    yield self._table_info(rows, table_index, method_used, page=page_num)
+                    table_index += 1
+                
+                self.extraction_time = time.time() - start_time
+                return
+            
+            if method == 'auto':
+                page_methods = page_flavors(source, page_nums)
+            else:
+                page_methods = ((page_num, method) for page_num in page_nums)
+            
+            for page_num, page_method in page_methods:
+                area = {}
+                if regions is not None:
+                    # One table per area; guessing would search the whole page again
+                    area = {'area': [tabula_area(bbox) for bbox in regions[page_num]],
+                            'guess': False}
+                
+                if page_method == 'both':
+                    tables_lattice = self._read_pdf(source.path, page_num, lattice=True, **area)
+                    tables_stream = self._read_pdf(source.path, page_num, stream=True, **area)
+                    
+                    if len(tables_lattice) >= len(tables_stream):
+                        page_tables, method_used = tables_lattice, 'lattice'
+                    else:
+                        page_tables, method_used = tables_stream, 'stream'
+                else:
+                    page_tables = self._read_pdf(source.path, page_num, **{page_method: True}, **area)
+                    method_used = page_method
+                self.page_methods[page_num] = method_used
+                
+                for rows in page_tables:
+                    yield self._table_info(rows, table_index, method_used, page=page_num)
+                    table_index += 1
+        
+        self.extraction_time = time.time() - start_time
+    
+    def extract_batch(self, pdf_paths: Iterable[str],
+                      pages: Union[str, Callable[[str], str]] = 'all',
+                      method: str = 'auto', workers: int = 1,
+                      files_per_jvm: int = 200,
+                      jvm_heap: str = '1g') -> Iterator[Dict[str, Any]]:
+        """
+        Extract many PDFs in long-lived worker JVMs, yielding per-file results
+        
+        Each worker process starts one JVM and processes files until it has
+        done files_per_jvm of them; it is then replaced by a fresh worker,
+        which bounds any leak in tabula-java or PDFBox. Results come back in
+        input order as soon as each file (and every file before it) is done.
+        
+        Args:
+            pdf_paths: PDF file paths
+            pages: Pages spec for every file, or a function of the path
+                   (e.g. TablePageIndex.pages_for)
+            method: 'both', 'auto', 'lattice' or 'stream' (see extract_tables)
+            workers: Worker processes, each with its own JVM
+            files_per_jvm: Files processed by one JVM before it is restarted
+            jvm_heap: Heap cap per worker JVM when the extractor has none
+            
+        Yields:
+            Per-file dicts: 'pdf_path', 'tables', 'num_tables',
+            'extraction_time' (seconds inside the worker), 'worker_pid'
+            and 'error' (None on success)
+        """
+        if not java_available():
+            raise RuntimeError("Java not found - Tabula requires Java to be installed")
+        
+        settings = dict(self.jvm_settings)
+        settings['jvm_heap'] = settings['jvm_heap'] or jvm_heap
+        page_spec = pages if callable(pages) else (lambda pdf_path: pages)
+        jobs = ((str(pdf_path), page_spec(str(pdf_path)), method) for pdf_path in pdf_paths)
+        
+        # Spawned, not forked: a forked copy of a running JVM is unusable
+        context = multiprocessing.get_context('spawn')
+        start_time = time.time()
+        count = 0
+        
+        with context.Pool(processes=max(1, workers), initializer=_init_batch_worker,
+                          initargs=(settings,), maxtasksperchild=max(1, files_per_jvm)) as pool:
+            for result in pool.imap(_batch_extract, jobs):
+                count += 1
+                if self.verbose:
+                    status = (f"{result['num_tables']} tables" if result['error'] is None
+                              else f"error: {result['error']}")
+                    print(f"  [{count}] {Path(result['pdf_path']).name}: {status} "
+                          f"in {result['extraction_time']:.2f}s (pid {result['worker_pid']})")
+                yield result
+        
+        self.extraction_time = time.time() - start_time
+        
+        if self.verbose:
+            print(f"Processed {count} files in {self.extraction_time:.2f}s\n")
+    
+    def _json_metadata(self) -> Dict[str, Any]:
+        """Run metadata written alongside the tables (tables_to_json, extract_to_file)"""
+        return {
+            'extraction_time': self.extraction_time,
+            'method': 'tabula'
+        }
+    
     def tables_to_json(self, tables: List[Dict[str, Any]], 
                        include_metadata: bool = True) -> str:
         """
@@ -121,8 +506,7 @@ class TabulaExtractor:
         if include_metadata:
             output = {
                 'num_tables': len(tables),
-                'extraction_time': self.extraction_time,
-                'method': 'tabula',
+                **self._json_metadata(),
                 'tables': tables
             }
         else:
@@ -130,39 +514,61 @@ class TabulaExtractor:
         
         return json.dumps(output, indent=2)
     
-    def extract_to_file(self, pdf_path: str, output_path: str):
+    def extract_to_file(self, pdf_path: PdfInput, output_path: str, pages: str = 'all',
+                        method: str = 'both'):
         """
         Extract tables and save to JSON file
         
         Args:
             pdf_path: Input PDF path
             output_path: Output JSON path
+            pages: Pages to process
+            method: 'both', 'auto', 'lattice' or 'stream' (see extract_tables)
         """
-        tables = self.extract_tables(pdf_path)
-        json_output = self.tables_to_json(tables)
-        
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w') as f:
-            f.write(json_output)
+        # Each table is written as soon as its page is done, the metadata
+        # once the iterator finishes
+        tables = self.iter_tables(pdf_path, pages=pages, method=method)
+        try:
+            num_tables = write_tables_json(output_path, tables, final_metadata=self._json_metadata)
+        except Exception as e:
+            print(f"Error processing {pdf_name(pdf_path)}: {e}")
+            return
         
         if self.verbose:
-            print(f"Saved to {output_file}")
+            print(f"Saved {num_tables} tables to {output_path}")
 
 def main():
     """Example usage"""
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python tabula_extractor.py <pdf_file> [output.json]")
+        print("Usage: python tabula_extractor.py <pdf_file> [output.json] [method]")
+        print("       python tabula_extractor.py <pdf_dir> [output_dir] [method]")
+        print("  method: both, auto, lattice or stream (default: both)")
         sys.exit(1)
     
     pdf_file = sys.argv[1]
+    method = sys.argv[3] if len(sys.argv) > 3 else "both"
+    
+    if Path(pdf_file).is_dir():
+        # Batch: one JSON per PDF, all files through the same worker JVM
+        output_dir = Path(sys.argv[2] if len(sys.argv) > 2 else "output_tabula")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        extractor = TabulaExtractor(verbose=True, eager_jvm=False)
+        pdf_paths = sorted(Path(pdf_file).glob('*.pdf'))
+        for result in extractor.extract_batch(pdf_paths, method=method):
+            output = {k: v for k, v in result.items() if k != 'worker_pid'}
+            output['method'] = 'tabula'
+            with open(output_dir / (Path(result['pdf_path']).stem + '.json'), 'w') as f:
+                json.dump(output, f, indent=2)
+        print(f"Saved to {output_dir}")
+        return
+    
     output_file = sys.argv[2] if len(sys.argv) > 2 else "output_tabula.json"
     
     extractor = TabulaExtractor(verbose=True)
-    extractor.extract_to_file(pdf_file, output_file)
+    extractor.extract_to_file(pdf_file, output_file, method=method)
 
 if __name__ == "__main__":
     main()
@@ -13,15 +13,20 @@ sys.path.append(str(Path(__file__).parent))
 
 from methods.traditional.pdfplumber_extractor import PDFPlumberExtractor
 from evaluation.metrics import evaluate_extraction, print_results, save_results
+from evaluation.dataset import project_columns, sample_pdf
+from methods.page_index import TablePageIndex, ground_truth_pages, detect_table_pages
 
 
-def load_ground_truth(dataset_path: str, sample_limit: int = None) -> List[Dict]:
+def load_ground_truth(dataset_path: str, sample_limit: int = None,
+                      columns: List[str] = None) -> List[Dict]:
     """
     Load ground truth from FinTabNet.c dataset
     
     Args:
         dataset_path: Path to dataset directory
         sample_limit: Maximum number of samples to load
+        columns: Columns to read (default: key, PDF reference and annotations).
+                 Image columns are left undecoded.
         
     Returns:
         List of samples with ground truth
@@ -41,6 +46,9 @@ def load_ground_truth(dataset_path: str, sample_limit: int = None) -> List[Dict]
         split_name = list(dataset.keys())[0]
         data = dataset[split_name]
     
+    # Only read the columns we use; keep images as raw bytes
+    data = project_columns(data, columns)
+    
     print(f"Loaded {len(data)} samples")
     
     if sample_limit:
@@ -50,17 +58,49 @@ def load_ground_truth(dataset_path: str, sample_limit: int = None) -> List[Dict]
     return data
 
 
-def run_pdfplumber_benchmark(samples: List[Dict], output_dir: Path) -> Dict:
+def build_page_index(samples: List[Dict], source: str) -> TablePageIndex:
+    """
+    Build the table-page index that drives each extractor's pages argument
+    
+    Args:
+        samples: Dataset samples
+        source: 'ground_truth', 'detect', 'none', or path to a saved index
+        
+    Returns:
+        TablePageIndex (empty for 'none', so every document uses all pages)
+    """
+    if source == 'none':
+        return TablePageIndex()
+    if source == 'ground_truth':
+        return TablePageIndex.from_ground_truth(samples)
+    if source == 'detect':
+        index = TablePageIndex()
+        for sample in samples:
+            pdf, name = sample_pdf(sample)
+            if pdf is not None and name:
+                index.add(name, detect_table_pages(pdf))
+        return index
+    return TablePageIndex.load(source)
+
+
+def run_pdfplumber_benchmark(samples: List[Dict], output_dir: Path,
+                             page_index: TablePageIndex = None,
+                             prefilter: bool = False) -> Dict:
     """Run pdfplumber benchmark"""
     print("\n" + "="*60)
     print("Running pdfplumber benchmark")
     print("="*60)
     
-    extractor = PDFPlumberExtractor(verbose=False)
+    extractor = PDFPlumberExtractor(verbose=False, prefilter=prefilter)
+    page_index = page_index or TablePageIndex()
     
     predicted_tables = []
     ground_truth_tables = []
     
+    # Pre-filter accounting: pages skipped, and ground-truth table pages among them
+    prefilter_stats = {'pages_processed': 0, 'pages_skipped': 0,
+                       'gt_table_pages': 0, 'gt_table_pages_skipped': 0}
+    
     for i, sample in enumerate(samples):
         print(f"Processing sample {i+1}/{len(samples)}...", end='\r')
         
@@ -68,9 +108,17 @@ def run_pdfplumber_benchmark(samples: List[Dict], output_dir: Path) -> Dict:
         # Note: This assumes samples have 'pdf_path' and 'ground_truth' fields
         # Adjust based on actual dataset structure
         if 'pdf' in sample or 'pdf_path' in sample:
-            pdf_path = sample.get('pdf_path') or sample.get('pdf')
-            tables = extractor.extract_tables(pdf_path)
+            pdf, name = sample_pdf(sample)
+            pages = page_index.pages_for(name) if name else 'all'
+            tables = extractor.extract_tables(pdf, pages=pages)
             predicted_tables.extend([t['data'] for t in tables])
+            
+            if prefilter:
+                gt_pages = set(ground_truth_pages(sample.get('json')))
+                prefilter_stats['pages_processed'] += extractor.pages_processed
+                prefilter_stats['pages_skipped'] += len(extractor.skipped_pages)
+                prefilter_stats['gt_table_pages'] += len(gt_pages)
+                prefilter_stats['gt_table_pages_skipped'] += len(gt_pages & set(extractor.skipped_pages))
         
         # Get ground truth
         if 'tables' in sample or 'ground_truth' in sample:
@@ -87,6 +135,21 @@ def run_pdfplumber_benchmark(samples: List[Dict], output_dir: Path) -> Dict:
         method_name="pdfplumber"
     )
     
+    if prefilter:
+        gt_pages = prefilter_stats['gt_table_pages']
+        prefilter_stats['table_page_recall'] = (
+            (gt_pages - prefilter_stats['gt_table_pages_skipped']) / gt_pages * 100
+            if gt_pages > 0 else None
+        )
+        results['prefilter'] = prefilter_stats
+        
+        total_pages = prefilter_stats['pages_processed'] + prefilter_stats['pages_skipped']
+        print(f"Pre-filter skipped {prefilter_stats['pages_skipped']} / {total_pages} pages")
+        if gt_pages > 0:
+            print(f"Pre-filter table-page recall: {prefilter_stats['table_page_recall']:.2f}% "
+                  f"({prefilter_stats['gt_table_pages_skipped']} of {gt_pages} "
+                  f"ground-truth table pages skipped)")
+    
     # Save results
     output_file = output_dir / "pdfplumber_results.json"
     save_results(results, str(output_file))
@@ -123,6 +186,23 @@ def main():
         choices=['pdfplumber', 'tabula', 'camelot'],
         help='Methods to benchmark'
     )
+    parser.add_argument(
+        '--page-index',
+        type=str,
+        default='ground_truth',
+        help="Table-page index: 'ground_truth', 'detect', 'none', or a saved index JSON"
+    )
+    parser.add_argument(
+        '--prefilter',
+        action='store_true',
+        help='Skip pages the cheap table classifier rejects and report the recall cost'
+    )
+    parser.add_argument(
+        '--columns',
+        nargs='+',
+        default=None,
+        help='Dataset columns to load (default: key, PDF reference and annotations)'
+    )
     
     args = parser.parse_args()
     
@@ -132,13 +212,21 @@ def main():
     
     # Load samples
     sample_limit = None if args.samples == -1 else args.samples
-    samples = load_ground_truth(args.dataset, sample_limit=sample_limit)
+    samples = load_ground_truth(args.dataset, sample_limit=sample_limit,
+                                columns=args.columns)
+    
+    # Restrict extraction to pages that hold tables
+    page_index = build_page_index(samples, args.page_index)
+    if len(page_index):
+        print(f"Page index covers {len(page_index)} documents")
     
     # Run benchmarks
     all_results = {}
     
     if 'pdfplumber' in args.methods:
-        all_results['pdfplumber'] = run_pdfplumber_benchmark(samples, output_dir)
+        all_results['pdfplumber'] = run_pdfplumber_benchmark(
+            samples, output_dir, page_index, prefilter=args.prefilter
+        )
     
     # TODO: Add other methods
     # if 'tabula' in args.methods:
@@ -2,9 +2,11 @@
 """
 Quick test to check dataset access and structure
 """
-from datasets import load_dataset
+from datasets import load_dataset, Image
 from pathlib import Path
 
+from evaluation.dataset import project_columns, decode_image
+
 print("Testing FinTabNet.c dataset access...")
 print("=" * 60)
 
@@ -12,6 +14,9 @@ try:
     # Load just a tiny sample to test
     print("\n1. Loading dataset (streaming mode for testing)...")
     dataset = load_dataset("bsmock/FinTabNet.c", split="train", streaming=True, trust_remote_code=True)
+    # Every column, with images left undecoded until they are read below
+    dataset = project_columns(dataset, list(dataset.features or []))
+    features = dataset.features or {}
     
     print("✓ Dataset accessible!")
     
@@ -25,7 +30,11 @@ try:
     
     for key, value in first_sample.items():
         value_type = type(value).__name__
-        if isinstance(value, (list, dict, str)):
+        feature = features.get(key)
+        if isinstance(feature, Image):
+            image = decode_image(value, feature.mode)
+            value_preview = f"{image.width}x{image.height} {image.mode} image"
+        elif isinstance(value, (list, dict, str)):
             value_preview = str(value)[:100] + "..." if len(str(value)) > 100 else str(value)
         else:
             value_preview = value